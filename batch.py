@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Analyse par lots de fichiers de graphes (un ou plusieurs <GRAPHE> par fichier)
+
+Usage:
+    python batch.py archives/ --output resultats.jsonl
+    python batch.py "archives/**/*.txt" --processes 8 --output resultats.txt
+"""
+
+#--------------------[Remarques]--------------------
+#Chaque fichier est lu et analysé par un processus du pool: plus long des plus
+#courts chemins et table des distances de chacun de ses graphes.
+#
+#Les résultats sont écrits dans un seul fichier au fur et à mesure qu'ils
+#arrivent (l'ordre des fichiers n'est donc pas conservé): une ligne JSON par
+#graphe (.jsonl, .json) ou la table texte de cleanerTable (autres extensions).
+#
+#Une erreur (syntaxe, sommet inconnu, fichier illisible...) est rapportée pour
+#son fichier, sans interrompre le lot; les graphes du fichier lus avant
+#l'erreur sont conservés.
+#--------------------[Fin des remarques]--------------------
+
+
+import argparse
+import glob
+import json
+import math
+import multiprocessing as mp
+import os
+import sys
+import time
+import warnings
+
+from versionbug import Graph, StreamParser, Parser, tableHeader, tableRow
+
+
+def expandSources(sources)->list:
+    """Returns the files named by sources: files, directories (all the files
+    they contain, recursively) or glob patterns"""
+    files = []
+    for source in sources:
+        if os.path.isdir(source):
+            for directory, _, names in os.walk(source):
+                files.extend([os.path.join(directory, n) for n in names])
+        elif os.path.isfile(source):
+            files.append(source)
+        else:
+            files.extend([f for f in glob.glob(source, recursive=True) if os.path.isfile(f)])
+    return sorted(set(files))
+
+def jsonNumber(x):
+    "Returns x as a JSON number (None if infinite)"
+    return None if math.isinf(x) else x
+
+def analyseGraph(graph)->dict:
+    "Returns the longest shortest path and the distance table of graph"
+    base = sorted(graph.nodes)
+    lsp = graph.longestShortestPath() if len(base) > 0 else None
+    return {'name': graph.name, 'nodes': len(graph.nodes), 'arcs': len(graph.arcs),
+            'longestShortestPath': None if lsp is None else
+                {'length': jsonNumber(lsp.length()), 'nodes': [n.name for n in lsp.nodeList()]},
+            'base': [n.name for n in base],
+            'table': [[jsonNumber(float(d)) for d in row] for row in graph.baseDistances(base)]}
+
+def analyseFile(fileName, pyparsing=False)->list:
+    """Returns the results of the graphs of the fileName file, followed by
+    the error that stopped its reading if any"""
+    results = []
+    parser = Parser() if pyparsing else StreamParser()
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            for block, graph in enumerate(Graph.graphsFromFile(parser, fileName)):
+                results.append({'file': fileName, 'block': block, **analyseGraph(graph)})
+    except Exception as err:
+        results.append({'file': fileName, 'block': len(results),
+                        'error': f'{type(err).__name__}: {err}' if str(err) else type(err).__name__})
+    return results
+
+def analyseFileWith(arguments):
+    "analyseFile(*arguments), for Pool.imap_unordered"
+    return analyseFile(*arguments)
+
+class Name:
+    "Stand-in for a Node in tableHeader and tableRow"
+    __slots__ = ('name',)
+    def __init__(self, name):
+        self.name = name
+
+def formatText(result)->str:
+    "Returns the text report of a result of analyseFile"
+    title = f'{result["file"]} [{result["block"]}]'
+    if 'error' in result:
+        return f'{title}: ERREUR {result["error"]}\n\n'
+    lsp = result['longestShortestPath']
+    text = f'{title} {result["name"]}: {result["nodes"]} sommets, {result["arcs"]} arcs\n'
+    if lsp is not None:
+        length = '-' if lsp['length'] is None else lsp['length']
+        text += f'plus long des plus courts chemins: {" -> ".join(lsp["nodes"])} ({length})\n'
+    #Les noms suffisent à tableHeader et tableRow
+    base = [Name(n) for n in result['base']]
+    text += tableHeader(base)
+    for node0, row in zip(base, result['table']):
+        text += tableRow(node0, base, [float('inf') if d is None else d for d in row])
+    return text + '\n'
+
+def runBatch(files, output, processes=None, pyparsing=False, log=print)->dict:
+    """Analyses files in a pool of processes and writes the results to the
+    output file as they complete; returns the counts of graphs and errors"""
+    counts = {'files': len(files), 'graphs': 0, 'errors': 0}
+    jsonLines = os.path.splitext(output)[1].lower() in ('.jsonl', '.json')
+    #Des paquets de fichiers pour limiter les échanges entre processus
+    if processes is None:
+        processes = os.cpu_count()
+    chunksize = max(1, min(64, len(files) // (4*processes)))
+    with open(output, 'w', encoding='utf-8') as file, mp.Pool(processes) as pool:
+        tasks = [(f, pyparsing) for f in files]
+        for results in pool.imap_unordered(analyseFileWith, tasks, chunksize):
+            for r in results:
+                if 'error' in r:
+                    counts['errors'] += 1
+                    log(f'{r["file"]}: {r["error"]}')
+                else:
+                    counts['graphs'] += 1
+                file.write(json.dumps(r) + '\n' if jsonLines else formatText(r))
+            file.flush()
+    return counts
+
+
+if __name__ == "__main__":
+    arguments = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arguments.add_argument('sources', nargs='+', help='fichiers, répertoires ou motifs glob')
+    arguments.add_argument('--output', default='resultats.jsonl')
+    arguments.add_argument('--processes', type=int, default=None)
+    arguments.add_argument('--pyparsing', action='store_true', help='lit les fichiers avec Parser au lieu de StreamParser')
+    args = arguments.parse_args()
+
+    files = expandSources(args.sources)
+    start = time.perf_counter()
+    counts = runBatch(files, args.output, args.processes, args.pyparsing,
+                      log=lambda message: print(message, file=sys.stderr))
+    print(f'{counts["files"]} fichiers, {counts["graphs"]} graphes, {counts["errors"]} erreurs '
+          f'en {time.perf_counter() - start:.2f} s -> {args.output}')
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+Banc d'essai des étapes de versionbug.py sur des graphes synthétiques
+
+Usage:
+    python benchmark.py --sizes 100 1000 10000 --output benchmark.json
+    python benchmark.py --compare ancien.json nouveau.json
+"""
+
+#--------------------[Remarques]--------------------
+#Les graphes sont écrits au format <GRAPHE> </GRAPHE> (noms de sommets en
+#lettres, poids entiers) puis relus par les deux parsers.
+#
+#Chaque étape est chronométrée (meilleur temps sur --repeat essais) puis
+#rejouée sous tracemalloc pour mesurer le pic de mémoire allouée.
+#
+#Les étapes quadratiques (pyparsing, dijkstra, cleanerDijkstra) ne sont
+#lancées que jusqu'à une taille donnée par STAGE_LIMITS.
+#--------------------[Fin des remarques]--------------------
+
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from versionbug import Graph, Parser, StreamParser
+
+
+#Nombre d'arcs au delà duquel une étape n'est plus lancée (None: toujours)
+STAGE_LIMITS = {
+    'Parser.parse': 10**5,
+    'Graph.fromFile(Parser)': 10**5,
+    'Graph.fromFile(StreamParser)': None,
+    'dijkstra': 10**4,
+    'cleanerDijkstra': 10**4,
+    'shortestDistances': None,
+    'matrice': None,
+    'longestShortestPath': 10**5}
+
+TOPOLOGIES = ['random', 'grid', 'scaleFree', 'disconnected']
+
+#Nombre de sommets de la base de matrice
+MATRIX_BASE = 10
+
+
+#GENERATION DES GRAPHES
+def nodeName(i)->str:
+    "Returns the i-th node name: A, ..., Z, AA, AB, ... (letters only, as the grammar requires)"
+    name = ''
+    i += 1
+    while i > 0:
+        i, r = divmod(i - 1, 26)
+        name = chr(ord('A') + r) + name
+    return name
+
+def randomArcs(nodes, arcCount, rng):
+    "Yields arcCount arcs between uniformly drawn nodes"
+    for _ in range(arcCount):
+        yield rng.randrange(nodes), rng.randrange(nodes)
+
+def gridArcs(side):
+    "Yields the arcs of a side*side grid, in both directions between neighbours"
+    for i in range(side):
+        for j in range(side):
+            n = i*side + j
+            if j + 1 < side:
+                yield n, n + 1
+                yield n + 1, n
+            if i + 1 < side:
+                yield n, n + side
+                yield n + side, n
+
+def scaleFreeArcs(nodes, degree, rng):
+    """Yields the arcs of a preferential attachment graph: each new node is
+    linked to degree older nodes drawn proportionally to their degree, each
+    arc going either way"""
+    ends = list(range(min(degree, nodes)))
+    for n in range(len(ends), nodes):
+        for t in set([rng.choice(ends) for _ in range(degree)]):
+            yield (n, t) if rng.random() < 0.5 else (t, n)
+            ends.append(t)
+        ends.extend([n]*degree)
+
+def topologyArcs(topology, arcCount, rng):
+    "Returns the node count and the arc iterator of a topology with about arcCount arcs"
+    if topology == 'random':
+        nodes = max(2, arcCount // 4)
+        return nodes, randomArcs(nodes, arcCount, rng)
+    if topology == 'grid':
+        side = max(2, round(math.sqrt(arcCount / 4)))
+        return side*side, gridArcs(side)
+    if topology == 'scaleFree':
+        nodes = max(5, arcCount // 4)
+        return nodes, scaleFreeArcs(nodes, 4, rng)
+    if topology == 'disconnected':
+        #10 composantes aléatoires sans arc entre elles
+        components = 10
+        size = max(2, arcCount // (4*components))
+        def arcs():
+            for c in range(components):
+                for s, t in randomArcs(size, arcCount // components, rng):
+                    yield c*size + s, c*size + t
+        return components*size, arcs()
+    raise ValueError(f'unknown topology {topology}')
+
+def writeGraph(fileName, topology, arcCount, seed=0)->dict:
+    """Writes a <GRAPHE> </GRAPHE> file of the given topology with about
+    arcCount arcs, and returns its actual node and arc counts"""
+    rng = random.Random(seed)
+    nodes, arcs = topologyArcs(topology, arcCount, rng)
+    written = 0
+    with open(fileName, 'w') as file:
+        file.write(f'<GRAPHE Name="{topology}{arcCount}", Author="benchmark">\n<SOMMETS>\n')
+        for i in range(nodes):
+            file.write(nodeName(i) + ';\n')
+        file.write('</SOMMETS>\n<ARCS>\n')
+        for s, t in arcs:
+            file.write(f'{nodeName(s)} : {nodeName(t)} : {rng.randint(1, 99)};\n')
+            written += 1
+        file.write('</ARCS>\n</GRAPHE>\n')
+    return {'nodes': nodes, 'arcs': written}
+
+
+#MESURES
+def measure(function, repeat=1, memory=True):
+    """Returns the result of function(), its best time over repeat calls (in
+    seconds) and the peak of memory it allocated (in bytes, None if not memory)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    peak = None
+    if memory:
+        del result
+        tracemalloc.start()
+        result = function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, best, peak
+
+def sameDistances(graph, root)->bool:
+    "Returns True if dijkstra and cleanerDijkstra agree on the distances from root"
+    paths = graph.dijkstra(root)
+    tree = graph.cleanerDijkstra(root)
+    return all([paths[n].length() == tree.Deepness(n) for n in graph.nodes if n != root])
+
+def benchmarkGraph(fileName, limits, repeat=1, memory=True):
+    "Yields the measure (dict) of each stage on the graph of the fileName file"
+    arcCount = sum([1 for line in open(fileName) if line.count(':') == 2])
+
+    def record(stage, function):
+        limit = limits.get(stage)
+        if limit is not None and arcCount > limit:
+            return None, {'stage': stage, 'skipped': True}
+        result, seconds, peak = measure(function, repeat, memory)
+        return result, {'stage': stage, 'skipped': False, 'seconds': seconds, 'peakBytes': peak}
+
+    _, r = record('Parser.parse', lambda: Parser().parse(fileName))
+    yield r
+
+    def load(parser):
+        g = Graph()
+        g.fromFile(parser, fileName)
+        return g
+    _, r = record('Graph.fromFile(Parser)', lambda: load(Parser()))
+    yield r
+    graph, r = record('Graph.fromFile(StreamParser)', lambda: load(StreamParser()))
+    yield r
+
+    #Même source pour toutes les étapes mono-source: le premier sommet
+    root = graph.getNode(nodeName(0))
+    _, r = record('dijkstra', lambda: graph.dijkstra(root))
+    yield r
+    _, r = record('cleanerDijkstra', lambda: graph.cleanerDijkstra(root))
+    if not r['skipped']:
+        r['agreesWithDijkstra'] = sameDistances(graph, root)
+    yield r
+    _, r = record('shortestDistances', lambda: graph.searchDistances(root))
+    yield r
+
+    base = sorted(graph.nodes)[:MATRIX_BASE]
+    #Sans cache ni Floyd-Warshall: on mesure les recherches elles-mêmes
+    graph.cacheSize = 0
+    _, r = record('matrice', lambda: graph.matrice(base, method='dijkstra'))
+    yield r
+    _, r = record('longestShortestPath', lambda: graph.longestShortestPath())
+    yield r
+
+def versionInfo()->dict:
+    "Returns the description of the code and machine being measured"
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {'commit': commit, 'python': sys.version.split()[0], 'numpy': np.__version__,
+            'platform': platform.platform(), 'date': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+def runBenchmark(sizes, topologies, limits=STAGE_LIMITS, repeat=1, memory=True, seed=0, log=print)->dict:
+    "Runs all the stages on every topology and size, and returns the report"
+    report = {'version': versionInfo(), 'results': []}
+    with tempfile.TemporaryDirectory() as directory:
+        for topology in topologies:
+            for size in sizes:
+                fileName = os.path.join(directory, f'{topology}{size}.txt')
+                counts, seconds, _ = measure(lambda: writeGraph(fileName, topology, size, seed), memory=False)
+                log(f'{topology} {size}: {counts["nodes"]} sommets, {counts["arcs"]} arcs')
+                for r in benchmarkGraph(fileName, limits, repeat, memory):
+                    r.update({'topology': topology, 'size': size, **counts})
+                    report['results'].append(r)
+                    if not r['skipped']:
+                        log(f'    {r["stage"]:<30}{r["seconds"]:>10.4f} s')
+    return report
+
+def compareReports(old, new, tolerance=1.2)->list:
+    """Returns the stages of new slower than in old by more than tolerance
+    (as (topology, size, stage, old seconds, new seconds))"""
+    key = lambda r: (r['topology'], r['size'], r['stage'])
+    before = {key(r): r for r in old['results'] if not r['skipped']}
+    regressions = []
+    for r in new['results']:
+        if not r['skipped'] and key(r) in before:
+            oldSeconds = before[key(r)]['seconds']
+            if r['seconds'] > tolerance*oldSeconds:
+                regressions.append((*key(r), oldSeconds, r['seconds']))
+    return regressions
+
+
+if __name__ == "__main__":
+    arguments = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arguments.add_argument('--sizes', type=int, nargs='+', default=[10**2, 10**3, 10**4],
+                           help="nombres d'arcs visés (jusqu'à 10**6)")
+    arguments.add_argument('--topologies', nargs='+', default=TOPOLOGIES, choices=TOPOLOGIES)
+    arguments.add_argument('--repeat', type=int, default=1)
+    arguments.add_argument('--seed', type=int, default=0)
+    arguments.add_argument('--no-memory', action='store_true', help='ne mesure pas la mémoire')
+    arguments.add_argument('--output', default='benchmark.json')
+    arguments.add_argument('--compare', nargs=2, metavar=('ANCIEN', 'NOUVEAU'),
+                           help='compare deux rapports au lieu de mesurer')
+    arguments.add_argument('--tolerance', type=float, default=1.2)
+    args = arguments.parse_args()
+
+    if args.compare:
+        old, new = [json.load(open(f)) for f in args.compare]
+        regressions = compareReports(old, new, args.tolerance)
+        for topology, size, stage, before, after in regressions:
+            print(f'{topology} {size} {stage}: {before:.4f} s -> {after:.4f} s')
+        sys.exit(1 if regressions else 0)
+
+    report = runBenchmark(args.sizes, args.topologies, repeat=args.repeat,
+                          memory=not args.no_memory, seed=args.seed)
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=1)
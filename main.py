@@ -74,7 +74,7 @@ class Node:
             raise UnexistingElement
             return set()
         else:
-            return set([a for a in graph.arcs if a.target == self])
+            return set(graph.arcsTowardsIndex.get(self, ()))
     
     def arcsFrom(self, graph)->set:
         "Returns the sub-set of the graph's arcs departing from self"
@@ -82,7 +82,7 @@ class Node:
             raise UnexistingElement
             return set()
         else:
-            return set([a for a in graph.arcs if a.source == self])
+            return set(graph.arcsFromIndex.get(self, ()))
 
     def parents(self, graph)->set:
         """Returns the sub-set of the graph's nodes whose self is a child
@@ -91,7 +91,7 @@ class Node:
             raise UnexistingElement
             return set()
         else:
-            return set([a.source for a in graph.arcs if a.target == self])
+            return set([a.source for a in graph.arcsTowardsIndex.get(self, ())])
 
     def children(self, graph)->set:
         """Returns the sub-set of the graph's nodes whose self is a parent
@@ -100,7 +100,7 @@ class Node:
             raise UnexistingElement
             return set()
         else:
-            return set([a.target for a in graph.arcs if a.source == self])
+            return set([a.target for a in graph.arcsFromIndex.get(self, ())])
 
 class Arc:
 #---Dunder methods
@@ -139,12 +139,14 @@ class Graph:
         self.name = name
         self.nodes = set()
         self.arcs = set()
+        self.indexArcs()
     
     def __add__(self, other):
         g_ = self.__class__()
         g_.name = self.name + '+' + other.name
         g_.nodes = self.nodes | other.nodes
         g_.arcs = self.arcs | other.arcs
+        g_.indexArcs()
         return g_
     
     def __eq__(self, other):
@@ -164,7 +166,12 @@ class Graph:
         "Removes node from the graph"
         if not node in self.nodes:
             raise UnexistingElement
-        else: self.nodes.remove(node)
+        else:
+            self.nodes.remove(node)
+            #Les arcs incidents restent dans le graphe: on ne libère que les
+            #entrées vides de l'index
+            if not self.arcsFromIndex.get(node, True): del self.arcsFromIndex[node]
+            if not self.arcsTowardsIndex.get(node, True): del self.arcsTowardsIndex[node]
         
     def addArc(self, arc):
         "Adds arc to the graph"
@@ -174,12 +181,35 @@ class Graph:
             #
             #IL FAUT RAISE UN WARNING AMBIGOUS ELT
         self.arcs.add(arc)
+        self.indexArc(arc)
     
     def removeArc(self, arc):
         "Removes arc from the graph"
         if not arc in self.arcs:
             raise UnexistingElement
-        else: self.arcs.remove(arc)
+        else:
+            self.arcs.remove(arc)
+            self.unindexArc(arc)
+        
+    def indexArc(self, arc):
+        "Adds arc to the adjacency indexes of the graph"
+        self.arcsFromIndex.setdefault(arc.source, set()).add(arc)
+        self.arcsTowardsIndex.setdefault(arc.target, set()).add(arc)
+    
+    def unindexArc(self, arc):
+        "Removes arc from the adjacency indexes of the graph"
+        self.arcsFromIndex[arc.source].discard(arc)
+        self.arcsTowardsIndex[arc.target].discard(arc)
+    
+    def indexArcs(self):
+        "Rebuilds the adjacency indexes of the graph from its set of arcs"
+        #arcsFromIndex[n] (resp. arcsTowardsIndex[n]) est l'ensemble des arcs
+        #partant de n (resp. arrivant en n): Node.arcsFrom et Node.arcsTowards
+        #répondent ainsi en O(degré) au lieu de parcourir tous les arcs
+        self.arcsFromIndex = dict()
+        self.arcsTowardsIndex = dict()
+        for a in self.arcs:
+            self.indexArc(a)
         
     def getNode(self, name)->Node:
         "Returns one of the graph's nodes whose name is name"
@@ -211,6 +241,7 @@ class Graph:
     
         self.nodes = set([Node(n) for n in nodes])
         self.arcs = set([Arc(self.getNode(a[0]), self.getNode(a[1]), float(a[2])) for a in arcs])
+        self.indexArcs()
     
     def dijkstra(self, n0):
         "Returns the dictionary of shorter paths towards all the graph's nodes"
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Serveur HTTP local des plus courts chemins de graphes chargés une seule fois
+
+Usage:
+    python server.py graphe.txt [autre.txt ...] --port 8000
+
+Requêtes (GET, réponses JSON sauf les tables):
+    /                                       liste des graphes (HTML)
+    /graphs                                 liste des graphes
+    /distance?graph=graphe&source=A&target=B
+    /path?graph=graphe&source=A&target=B
+    /longest?graph=graphe                   plus long des plus courts chemins
+    /table?graph=graphe&base=A,B,C          table texte (tous les sommets par défaut)
+    /table.html?graph=graphe&base=A,B,C     table HTML
+    /stats                                  requêtes servies par le cache ou partagées
+"""
+
+#--------------------[Remarques]--------------------
+#Chaque graphe est lu une fois au démarrage, sous le nom de son fichier sans
+#extension (graphe.txt -> graphe). Un fichier mal formé empêche le démarrage.
+#
+#Les recherches tournent dans un pool de threads pour que la boucle asyncio
+#continue de répondre; un verrou par graphe protège son cache de recherches.
+#Deux requêtes identiques en cours partagent le même calcul, et les réponses
+#sont gardées (par version du graphe) dans un cache LRU: une requête répétée
+#est servie sans repasser par le pool.
+#--------------------[Fin des remarques]--------------------
+
+
+import argparse
+import asyncio
+import concurrent.futures
+import html
+import json
+import math
+import os
+import sys
+import threading
+import urllib.parse
+import warnings
+from collections import OrderedDict
+
+from versionbug import (Graph, StreamParser, UnexistingElement, AmbiguousElement,
+                        htmlHeader, htmlRow, tableHeader, tableRow)
+
+
+#Raisons des codes HTTP renvoyés
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           500: 'Internal Server Error'}
+
+
+class BadRequest(Exception):
+    "Raised when a request lacks a parameter or names an unknown graph or node"
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def jsonNumber(x):
+    "Returns x as a JSON number (None if infinite)"
+    return None if math.isinf(x) else x
+
+def pathDescription(path)->dict:
+    "Returns the JSON description of a Path"
+    return {'length': jsonNumber(path.length()),
+            'nodes': [n.name for n in path.nodeList()],
+            'arcs': [[a.source.name, a.target.name, a.weight] for a in path.arcList()]}
+
+
+class GraphService:
+    """Graphs loaded once, and the queries on them: each one is computed in
+    an executor, shared with the identical queries in flight, and memoized"""
+#---Dunder methods
+    def __init__(self, fileNames, workers=None, cacheSize=1024):
+        self.graphs = dict()
+        for fileName in fileNames:
+            g = Graph()
+            #L'erreur de syntaxe est déjà affichée par StreamParser.parseInto
+            try:
+                parsed = StreamParser().parseInto(g, fileName)
+            except UnexistingElement:
+                raise ValueError(f'{fileName}: an arc refers to an undeclared node')
+            if not parsed:
+                raise ValueError(f'{fileName}: syntax error')
+            self.graphs[os.path.splitext(os.path.basename(fileName))[0]] = g
+        self.locks = {name: threading.Lock() for name in self.graphs}
+        self.executor = concurrent.futures.ThreadPoolExecutor(workers)
+        #Calculs en cours (futures partagées) et réponses déjà calculées
+        self.inflight = dict()
+        self.results = OrderedDict()
+        self.cacheSize = cacheSize
+        self.hits = 0
+        self.coalesced = 0
+
+#---Custom methods
+    def graph(self, params):
+        "Returns the name and the graph of the graph parameter"
+        name = params.get('graph', next(iter(self.graphs), None))
+        if not name in self.graphs:
+            raise BadRequest(f'unknown graph {name}', 404)
+        return name, self.graphs[name]
+
+    def node(self, graph, params, key):
+        "Returns the node of graph named by the key parameter"
+        if not key in params:
+            raise BadRequest(f'missing parameter {key}')
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', AmbiguousElement)
+                return graph.getNode(params[key])
+        except UnexistingElement:
+            raise BadRequest(f'unknown node {params[key]}', 404)
+
+    def base(self, graph, params)->list:
+        "Returns the nodes of the base parameter (all the nodes, sorted, by default)"
+        if not params.get('base'):
+            return sorted(graph.nodes)
+        return [self.node(graph, {'base': n}, 'base') for n in params['base'].split(',')]
+
+    async def query(self, key, name, function, *args):
+        """Returns function(*args), computed in the executor under the lock of
+        the graph name, or the result of the identical query (same key and
+        version of the graph) already computed or in flight"""
+        key = (name, self.graphs[name].version) + key
+        if key in self.results:
+            self.hits += 1
+            self.results.move_to_end(key)
+            return self.results[key]
+        if key in self.inflight:
+            self.coalesced += 1
+        else:
+            def locked():
+                with self.locks[name]:
+                    return function(*args)
+            self.inflight[key] = asyncio.get_running_loop().run_in_executor(self.executor, locked)
+            self.inflight[key].add_done_callback(lambda future: self.store(key, future))
+        #shield: un client qui se déconnecte n'annule pas le calcul des autres
+        return await asyncio.shield(self.inflight[key])
+
+    def store(self, key, future):
+        "Moves the result of a finished query from inflight to the cache"
+        del self.inflight[key]
+        if not future.cancelled() and future.exception() is None and self.cacheSize > 0:
+            self.results[key] = future.result()
+            if len(self.results) > self.cacheSize:
+                self.results.popitem(last=False)
+
+    async def handle(self, route, params):
+        "Returns the status, content type and body of the answer to a request"
+        if route == '/':
+            links = ''.join([f'<li><a href="/table.html?graph={urllib.parse.quote(name)}">{html.escape(name)}</a>'
+                             f' ({len(g.nodes)} sommets, {len(g.arcs)} arcs)</li>' for name, g in self.graphs.items()])
+            return 200, 'text/html', f'<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"><title>graphes</title></head>\n<body>\n<ul>{links}</ul>\n</body>\n</html>\n'
+        if route == '/graphs':
+            return 200, 'application/json', [{'graph': name, 'name': g.name, 'nodes': len(g.nodes), 'arcs': len(g.arcs)}
+                                             for name, g in self.graphs.items()]
+        if route == '/stats':
+            return 200, 'application/json', {'hits': self.hits, 'coalesced': self.coalesced,
+                                             'cached': len(self.results), 'inflight': len(self.inflight)}
+        name, g = self.graph(params)
+        if route in ('/distance', '/path'):
+            source, target = self.node(g, params, 'source'), self.node(g, params, 'target')
+            #Une recherche complète depuis source (gardée dans le cache du graphe)
+            #sert ensuite toutes les cibles
+            if route == '/distance':
+                d = await self.query(('distance', source, target), name,
+                                     lambda: g.shortestDistances(source)[0].get(target, float('inf')))
+                return 200, 'application/json', {'graph': name, 'source': source.name,
+                                                  'target': target.name, 'distance': jsonNumber(d)}
+            path = await self.query(('path', source, target), name,
+                                    lambda: pathDescription(g.rebuildPath(source, target, g.shortestDistances(source)[1])))
+            return 200, 'application/json', {'graph': name, 'source': source.name, 'target': target.name, **path}
+        if route == '/longest':
+            path = await self.query(('longest',), name, lambda: pathDescription(g.longestShortestPath()))
+            return 200, 'application/json', {'graph': name, **path}
+        if route in ('/table', '/table.html'):
+            base = self.base(g, params)
+            rows = await self.query(('table', tuple(base)), name, lambda: list(g.baseDistances(base)))
+            if route == '/table':
+                return 200, 'text/plain', tableHeader(base) + ''.join([tableRow(n, base, r) for n, r in zip(base, rows)])
+            body = ''.join([htmlRow(n, base, r) for n, r in zip(base, rows)])
+            return 200, 'text/html', (f'<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"><title>{html.escape(g.name)}</title></head>\n'
+                                      f'<body>\n<h1>{html.escape(g.name)}</h1>\n<table border="1">\n'
+                                      + htmlHeader(base) + body + '</table>\n</body>\n</html>\n')
+        raise BadRequest(f'unknown route {route}', 404)
+
+    async def connection(self, reader, writer):
+        "Answers the requests of one HTTP/1.1 connection (kept alive)"
+        try:
+            while True:
+                requestLine = await reader.readline()
+                if not requestLine:
+                    break
+                headers = dict()
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                try:
+                    method, target, _ = requestLine.decode('latin-1').split()
+                    url = urllib.parse.urlsplit(target)
+                    params = dict(urllib.parse.parse_qsl(url.query))
+                    if method != 'GET':
+                        raise BadRequest(f'unsupported method {method}', 405)
+                    status, contentType, body = await self.handle(url.path, params)
+                except BadRequest as error:
+                    status, contentType, body = error.status, 'application/json', {'error': str(error)}
+                except ValueError:
+                    status, contentType, body = 400, 'application/json', {'error': 'malformed request'}
+                except Exception as error:
+                    status, contentType, body = 500, 'application/json', {'error': repr(error)}
+                if contentType == 'application/json':
+                    body = json.dumps(body)
+                data = body.encode('utf-8')
+                close = headers.get('connection', '').lower() == 'close'
+                writer.write(f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+                             f'Content-Type: {contentType}; charset=utf-8\r\n'
+                             f'Content-Length: {len(data)}\r\n'
+                             f'Connection: {"close" if close else "keep-alive"}\r\n\r\n'.encode('latin-1') + data)
+                await writer.drain()
+                if close:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8000):
+        "Serves the graphs on host:port until cancelled"
+        server = await asyncio.start_server(self.connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    arguments = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arguments.add_argument('files', nargs='+', help='fichiers <GRAPHE> à charger')
+    arguments.add_argument('--host', default='127.0.0.1')
+    arguments.add_argument('--port', type=int, default=8000)
+    arguments.add_argument('--workers', type=int, default=None, help='threads de calcul')
+    args = arguments.parse_args()
+
+    try:
+        service = GraphService(args.files, args.workers)
+    except (ValueError, OSError) as error:
+        sys.exit(f'{error}, the server is not started')
+    for name, g in service.graphs.items():
+        print(f'{name}: {len(g.nodes)} sommets, {len(g.arcs)} arcs')
+    print(f'http://{args.host}:{args.port}/')
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
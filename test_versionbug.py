@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de versionbug.py (python -m pytest)
+"""
+
+import os
+import random
+import warnings
+
+import numpy as np
+import pyparsing as pp
+import pytest
+
+from versionbug import Graph, Node, Arc, DistanceTable, Parser, StreamParser, IncorrectSyntax
+from benchmark import writeGraph, TOPOLOGIES
+
+
+GRAPHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'graphe.txt')
+
+
+#GRAPHES DE TEST
+def randomGraph(rng, nodes=12, arcs=30):
+    "Returns a random graph with nodes uniquely named nodes and arcs random arcs"
+    g = Graph()
+    g.addNodes([Node(f'N{i:02d}') for i in range(nodes)])
+    pool = sorted(g.nodes)
+    g.addArcs([Arc(rng.choice(pool), rng.choice(pool), rng.randint(1, 20)) for _ in range(arcs)])
+    return g
+
+def loadGraphe(parser):
+    "Returns the graph of graphe.txt read by parser"
+    g = Graph()
+    g.fromFile(parser, GRAPHE)
+    return g
+
+def signature(g)->tuple:
+    "Returns the name, node names and arcs (by names) of g, comparable between two readings"
+    return (g.name, sorted([n.name for n in g.nodes]),
+            sorted([(a.source.name, a.target.name, a.weight) for a in g.arcs]))
+
+
+#LECTURE DES FICHIERS
+def test_parsersReadTheSameGraphe():
+    assert signature(loadGraphe(Parser())) == signature(loadGraphe(StreamParser()))
+
+@pytest.mark.parametrize('topology', TOPOLOGIES)
+def test_parsersReadTheSameGraphs(topology, tmp_path):
+    fileName = str(tmp_path / f'{topology}.txt')
+    writeGraph(fileName, topology, 400)
+    graphs = [signature(g) for g in Graph.graphsFromFile(Parser(), fileName)]
+    assert graphs == [signature(g) for g in Graph.graphsFromFile(StreamParser(), fileName)]
+    assert len(graphs) == 1
+
+def test_parsersReportTheSameError(tmp_path):
+    #Dernier sommet sans ';': pyparsing revient au début de ce sommet
+    fileName = str(tmp_path / 'erreur.txt')
+    with open(fileName, 'w') as file:
+        file.write('<GRAPHE Name="erreur">\n<SOMMETS>\nA; B; C\n</SOMMETS>\n<ARCS>\n</ARCS>\n</GRAPHE>\n')
+    with pytest.raises(pp.ParseException) as expected:
+        Parser().graphePattern.parseFile(fileName, parseAll=True)
+    with pytest.raises(IncorrectSyntax) as found:
+        StreamParser().read(fileName)
+    assert (found.value.lineno, found.value.column) == (expected.value.lineno, expected.value.column) == (3, 7)
+    assert str(found.value) == str(expected.value)
+
+
+#PLUS COURTS CHEMINS
+def test_heapEngineMatchesDijkstra():
+    g = loadGraphe(StreamParser())
+    for n0 in g.nodes:
+        paths = g.dijkstra(n0)
+        dist, parentArcs = g.shortestDistances(n0)
+        for n in g.nodes:
+            assert dist.get(n, float('inf')) == paths[n].length()
+            assert g.rebuildPath(n0, n, parentArcs).length() == paths[n].length()
+
+def test_searchesSkipRemovedNodes():
+    #removeNode laisse les arcs A -> X -> B: aucune recherche ne doit passer par X
+    g = Graph()
+    A, X, B = Node('A'), Node('X'), Node('B')
+    g.addNodes([A, X, B])
+    g.addArcs([Arc(A, X, 1), Arc(X, B, 1)])
+    g.removeNode(X)
+    assert g.shortestDistances(A)[0] == {A: 0}
+    assert g.shortestPath(A, B).length() == float('inf')
+    assert g.shortestPath(A, B, bidirectional=True).length() == float('inf')
+    assert g.shortestPath(A, B, oracle=g.landmarks(2)).length() == float('inf')
+    assert g.dijkstra(A)[B].length() == float('inf')
+    assert g.cleanerDijkstra(A).Deepness(B) == float('inf')
+    np.testing.assert_array_equal(g.matrice([A, B], 'dijkstra'), g.matrice([A, B], 'floyd'))
+
+
+#DISTANCES SUIVIES (Graph.trackDistances)
+def randomModification(g, rng, counter, removed):
+    """Applies a random addArc, removeArc, setWeight, addNode or removeNode to
+    g (addNode may bring back one of the removed nodes, with its arcs)"""
+    nodes = sorted(g.nodes)
+    arcs = sorted(g.arcs, key=lambda a: (a.source.name, a.target.name, a.weight))
+    operation = rng.choice(['addArc', 'addArc', 'removeArc', 'setWeight', 'setWeight', 'addNode', 'removeNode'])
+    if operation == 'addArc' and len(nodes) > 0:
+        g.addArc(Arc(rng.choice(nodes), rng.choice(nodes), rng.randint(1, 20)))
+    elif operation == 'removeArc' and len(arcs) > 0:
+        g.removeArc(rng.choice(arcs))
+    elif operation == 'setWeight' and len(arcs) > 0:
+        g.setWeight(rng.choice(arcs), rng.randint(1, 20))
+    elif operation == 'addNode':
+        if len(removed) > 0 and rng.random() < 0.5:
+            g.addNode(removed.pop(rng.randrange(len(removed))))
+        else:
+            g.addNode(Node(f'M{next(counter):02d}'))
+    elif operation == 'removeNode' and len(nodes) > 1:
+        #Ses arcs restent dans le graphe (cf. Graph.removeNode)
+        node = rng.choice(nodes)
+        g.removeNode(node)
+        removed.append(node)
+
+@pytest.mark.parametrize('seed', range(20))
+def test_trackDistancesMatchesFullRecompute(seed):
+    rng = random.Random(seed)
+    counter = iter(range(1000))
+    removed = []
+    with warnings.catch_warnings():
+        #Arcs en double: AmbiguousElement, à titre informatif
+        warnings.simplefilter('ignore')
+        g = randomGraph(rng)
+        table = g.trackDistances()
+        for _ in range(40):
+            randomModification(g, rng, counter, removed)
+            #Recalcul complet: une nouvelle table, et Floyd-Warshall sur le graphe figé
+            #(la table suivie range les sommets ajoutés à la fin)
+            fresh = DistanceTable(g)
+            assert sorted(table.nodes) == fresh.nodes
+            order = [table.ids[n] for n in fresh.nodes]
+            D = table.D[np.ix_(order, order)]
+            np.testing.assert_array_equal(D, fresh.D)
+            np.testing.assert_array_equal(D, g.freeze().floydWarshall())
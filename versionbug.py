@@ -41,8 +41,27 @@ Created on Sun Oct  8 13:59:06 2023
 #On représentera le plus court chemin entre n0 et n1 2 points non connexes par Path({n0, n1}, {})
 #   -> par convention, length = inf
 #   -> on le représente par '-'
+#   -> dans les calculs en masse (dijkstra), toutes les paires d'une même
+#   source n0 partagent un seul NoPath(n0), sans sommet d'arrivée
 
 
+import csv
+import functools
+import hashlib
+import heapq
+import html
+import itertools
+import json
+import math
+from collections import Counter, OrderedDict
+from collections.abc import Mapping, Set
+import multiprocessing as mp
+import os
+import re
+import sys
+import time
+import warnings
+import numpy as np
 import pyparsing as pp
 import railroad
 import graphviz as gv
@@ -52,20 +71,126 @@ class UnexistingElement(Exception):
     "Raised when an instruction refers to an unexisting element"
     pass
 
-#class AmbiguousElement(Exception):
-#    "Raised when two distinct instances share the same attributes"
-#    pass
+class AmbiguousElement(UserWarning):
+    "Warned when two distinct instances share the same attributes"
+    pass
     
 class IncorrectPath(Exception):
     "Raised when an instruction refers to an incorrect Path"
+
+class ReadOnlyGraph(Exception):
+    "Raised when an instruction modifies a GraphView"
+
+class IncorrectSyntax(Exception):
+    "Raised when StreamParser meets a file that doesn't follow the <GRAPHE> syntax"
+    def __init__(self, line, lineno, column, loc, expected, found):
+        super().__init__(line, lineno, column, loc, expected, found)
+        #Mêmes attributs que pp.ParseException, pour afficher l'erreur de même
+        self.line = line.rstrip('\n')
+        self.lineno = lineno
+        self.column = column
+        self.loc = loc
+        self.expected = expected
+        self.found = found
+    
+    def __str__(self):
+        return f'Expected {self.expected}, found {self.found}  (at char {self.loc}), (line:{self.lineno}, col:{self.column})'
+    
+    
+
+#Coût d'une relaxation de Dijkstra (tas en Python) rapporté à celui d'une
+#mise à jour de Floyd-Warshall (vectorisée): de 13 à 20 sur des graphes
+#aléatoires de 300 à 1000 sommets, 17 en moyenne
+FLOYD_COST_RATIO = 17
+
+def chooseMatrixMethod(nodeCount, arcCount, baseCount=None)->str:
+    """Returns the method used by matrice in 'auto' mode ('floyd' or
+    'dijkstra'), comparing the costs of Floyd-Warshall (V³) and of one
+    search per base node (|base|·E·log V)"""
+    if baseCount is None:
+        baseCount = nodeCount
+    if nodeCount > 1 and FLOYD_COST_RATIO * baseCount * arcCount * math.log2(nodeCount) >= nodeCount**3:
+        return 'floyd'
+    return 'dijkstra'
+
+
+#INSTRUMENTATION
+#Profiler actif (cf. Profiler.__enter__), None en dehors d'un bloc with: les
+#routines ne font alors qu'un test 'is None' par appel
+activeProfiler = None
+
+class Profiler:
+    """Opt-in instrumentation of the shortest-path routines and of the parsers:
+        with Profiler() as profiler:
+            g.longestShortestPath()
+        print(profiler.export())
+    Counters (settled nodes, relaxations, queue operations, allocated Paths,
+    ...) and wall times (per routine, inclusive, and per phase of dijkstra and
+    cleanerDijkstra) are only gathered inside the with block"""
+#---Dunder methods
+    def __init__(self):
+        self.counters = dict()
+        self.times = dict()
+        self.previous = None
     
+    def __enter__(self):
+        global activeProfiler
+        self.previous = activeProfiler
+        activeProfiler = self
+        return self
+    
+    def __exit__(self, *exception):
+        global activeProfiler
+        activeProfiler = self.previous
+        return False
+    
+#---Custom methods
+    def count(self, name, n=1):
+        "Adds n to the name counter"
+        self.counters[name] = self.counters.get(name, 0) + n
     
+    def addTime(self, name, seconds):
+        "Adds seconds to the wall time of the name routine or phase"
+        self.times[name] = self.times.get(name, 0) + seconds
+    
+    def export(self)->dict:
+        "Returns the counters and wall times (in seconds) gathered so far"
+        return {'counters': dict(self.counters), 'times': dict(self.times)}
+    
+    def jsonLines(self)->str:
+        "Returns the counters and wall times as JSON lines, one per measure"
+        lines = [json.dumps({'kind': 'counter', 'name': k, 'value': v}) for k, v in self.counters.items()]
+        lines += [json.dumps({'kind': 'time', 'name': k, 'seconds': v}) for k, v in self.times.items()]
+        return '\n'.join(lines)
+
+def profiled(name):
+    "Decorator counting the calls and the wall time of a routine in the active Profiler"
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if activeProfiler is None:
+                return function(*args, **kwargs)
+            profiler = activeProfiler
+            profiler.count(name + '.calls')
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler.addTime(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
 
 #OBJETS
 class Node:
+    #Pas de __dict__ par instance; l'égalité et le hachage restent ceux de
+    #l'identité (cf. préface). Le nom n'est pas censé changer
+    __slots__ = ('name',)
+    
 #---Dunder methods
     def __init__(self, name):
-        self.name = str(name)
+        #Les sommets de même nom partagent la même chaîne
+        self.name = sys.intern(str(name))
         
     def __repr__(self):
         "Precise description"
@@ -85,7 +210,7 @@ class Node:
             raise UnexistingElement
             return set()
         else:
-            return set([a for a in graph.arcs if a.target == self])
+            return set(graph.arcsTowardsIndex.get(self, ()))
     
     def arcsFrom(self, graph)->set:
         "Returns the sub-set of the graph's arcs departing from self"
@@ -93,9 +218,12 @@ class Node:
             raise UnexistingElement
             return set()
         else:
-            return set([a for a in graph.arcs if a.source == self])
+            return set(graph.arcsFromIndex.get(self, ()))
 
 class Arc:
+    #Pas de __dict__ par instance. Seul Graph.setWeight modifie un arc
+    __slots__ = ('source', 'target', 'weight')
+    
 #---Dunder methods
     def __init__(self, source, target, weight):
         self.source = source
@@ -127,14 +255,31 @@ class Graph:
 #---Dunder methods
     def __init__(self, nodes = set(), arcs = set(), name='graphe'):
         self.name = name
-        self.nodes = nodes
-        self.arcs = arcs
+        #On copie les ensembles: les valeurs par défaut seraient sinon partagées
+        #par toutes les instances (et leurs index avec)
+        self.nodes = set(nodes)
+        self.arcs = set(arcs)
+        #Numéro de version, incrémenté à chaque modification du graphe
+        self.version = 0
+        #Cache LRU des résultats de shortestDistances (cf. cachedSearch)
+        self.cacheSize = 128
+        self.distanceCache = None
+        self.cacheVersion = None
+        self.cacheHits = 0
+        self.cacheMisses = 0
+        #Table des distances tenue à jour à chaque modification (cf. trackDistances)
+        self.distanceTable = None
+        #Composantes fortement connexes, recalculées après une modification (cf. condensation)
+        self.condensationCache = None
+        self.condensationVersion = None
+        self.index()
     
     def __add__(self, other):
         g_ = self.__class__()
         g_.name = self.name + '+' + other.name
         g_.nodes = self.nodes | other.nodes
         g_.arcs = self.arcs | other.arcs
+        g_.index()
         return g_
     
     def __sub__(self, other):
@@ -142,61 +287,198 @@ class Graph:
         g_.name = self.name + '-' + other.name
         g_.nodes = self.nodes | other.nodes
         g_.arcs = self.arcs - other.arcs
+        g_.index()
         return g_
     
     def __eq__(self, other):
         return self.arcs == other.arcs and self.nodes == other.nodes
     
 #---Custom methods
+    def union(self, other):
+        "Returns the union of self and other as a view, without copy (see Graph.__add__ for a copy)"
+        return UnionView(self, other)
+    
+    def difference(self, other):
+        "Returns self without the arcs of other as a view, without copy (see Graph.__sub__ for a copy)"
+        return DifferenceView(self, other)
+    
+    def subgraph(self, nodes = None, arcs = None, excludedNodes = (), excludedArcs = ()):
+        """Returns the view of the nodes and arcs of self kept by a filter,
+        without copy (see SubgraphView)"""
+        return SubgraphView(self, nodes, arcs, excludedNodes, excludedArcs)
+    
+    def storeNode(self, node)->bool:
+        """Adds node to the graph and its name index
+        Returns True if another node already has the same name"""
+        if node in self.nodes:
+            return False
+        ambiguous = node.name in self.nodesByName
+        self.nodes.add(node)
+        self.version += 1
+        self.nodesByName.setdefault(node.name, []).append(node)
+        if self.distanceTable is not None: self.distanceTable.nodeAdded(node)
+        return ambiguous
+    
     def addNode(self, node):
         "Adds node to the graph"
-        if node.name in [n.name for n in self.nodes]:
-            pass
+        if self.storeNode(node):
             #Pseudo-erreur, juste à titre informatif
-            #
-            #IL FAUT RAISE UN WARNING AMBIGOUS ELT
-        self.nodes.add(node)
+            warnings.warn(f'{node!r} shares its name with another node', AmbiguousElement, stacklevel=2)
+    
+    def addNodes(self, nodes):
+        "Adds the nodes of an iterable to the graph, in linear time"
+        ambiguous = sum([self.storeNode(n) for n in nodes])
+        if ambiguous > 0:
+            warnings.warn(f'{ambiguous} node(s) share their name with another node', AmbiguousElement, stacklevel=2)
         
     def removeNode(self, node):
         "Removes node from the graph"
         if not node in self.nodes:
             raise UnexistingElement
-        else: self.nodes.remove(node)
+        else:
+            self.nodes.remove(node)
+            self.version += 1
+            self.nodesByName[node.name].remove(node)
+            if len(self.nodesByName[node.name]) == 0: del self.nodesByName[node.name]
+            if self.distanceTable is not None: self.distanceTable.rebuild()
+            #Les arcs incidents restent dans le graphe: on ne libère que les
+            #entrées vides de l'index
+            if not self.arcsFromIndex.get(node, True): del self.arcsFromIndex[node]
+            if not self.arcsTowardsIndex.get(node, True): del self.arcsTowardsIndex[node]
         
+    def storeArc(self, arc)->bool:
+        """Adds arc to the graph and its indexes
+        Returns True if another arc already has the same source, target and weight"""
+        if arc in self.arcs:
+            return False
+        ambiguous = (arc.source, arc.target, arc.weight) in self.arcKeys
+        self.arcs.add(arc)
+        self.version += 1
+        self.indexArc(arc)
+        if self.distanceTable is not None: self.distanceTable.arcAdded(arc)
+        return ambiguous
+    
     def addArc(self, arc):
         "Adds arc to the graph"
-        if (arc.source, arc.target, arc.weight) in [(a.source, a.target, a.weight) for a in self.arcs]:
-            pass
+        if self.storeArc(arc):
             #Pseudo-erreur, juste à titre informatif
-            #
-            #IL FAUT RAISE UN WARNING AMBIGOUS ELT
-        self.arcs.add(arc)
+            warnings.warn(f'{arc!r} is already in the graph', AmbiguousElement, stacklevel=2)
+    
+    def addArcs(self, arcs):
+        "Adds the arcs of an iterable to the graph, in linear time"
+        ambiguous = sum([self.storeArc(a) for a in arcs])
+        if ambiguous > 0:
+            warnings.warn(f'{ambiguous} arc(s) already in the graph', AmbiguousElement, stacklevel=2)
     
     def removeArc(self, arc):
         "Removes arc from the graph"
         if not arc in self.arcs:
             raise UnexistingElement
-        else: self.arcs.remove(arc)
+        else:
+            self.arcs.remove(arc)
+            self.version += 1
+            self.unindexArc(arc)
+            if self.distanceTable is not None: self.distanceTable.arcRemoved(arc.source, arc.target, arc.weight)
+    
+    def setWeight(self, arc, weight):
+        "Changes the weight of one of the graph's arcs"
+        if not arc in self.arcs:
+            raise UnexistingElement
+        oldWeight = arc.weight
+        self.unindexArc(arc)
+        arc.weight = weight
+        self.indexArc(arc)
+        self.version += 1
+        if self.distanceTable is not None:
+            if weight < oldWeight:
+                self.distanceTable.arcAdded(arc)
+            elif weight > oldWeight:
+                self.distanceTable.arcRemoved(arc.source, arc.target, oldWeight)
+        
+    def indexArc(self, arc):
+        "Adds arc to the indexes of the graph"
+        self.arcsFromIndex.setdefault(arc.source, set()).add(arc)
+        self.arcsTowardsIndex.setdefault(arc.target, set()).add(arc)
+        key = (arc.source, arc.target, arc.weight)
+        self.arcKeys[key] = self.arcKeys.get(key, 0) + 1
+    
+    def unindexArc(self, arc):
+        "Removes arc from the indexes of the graph"
+        self.arcsFromIndex[arc.source].discard(arc)
+        self.arcsTowardsIndex[arc.target].discard(arc)
+        key = (arc.source, arc.target, arc.weight)
+        self.arcKeys[key] -= 1
+        if self.arcKeys[key] == 0: del self.arcKeys[key]
+    
+    def indexArcs(self):
+        "Rebuilds the adjacency indexes of the graph from its set of arcs"
+        #arcsFromIndex[n] (resp. arcsTowardsIndex[n]) est l'ensemble des arcs
+        #partant de n (resp. arrivant en n): Node.arcsFrom et Node.arcsTowards
+        #répondent ainsi en O(degré) au lieu de parcourir tous les arcs
+        #arcKeys compte les arcs de chaque triplet (source, cible, poids)
+        self.arcsFromIndex = dict()
+        self.arcsTowardsIndex = dict()
+        self.arcKeys = dict()
+        for a in self.arcs:
+            self.indexArc(a)
+    
+    def indexNodes(self):
+        "Rebuilds the name index of the graph from its set of nodes"
+        #nodesByName[nom] est la liste des sommets portant ce nom
+        self.nodesByName = dict()
+        for n in self.nodes:
+            self.nodesByName.setdefault(n.name, []).append(n)
+    
+    def index(self):
+        "Rebuilds all the indexes of the graph"
+        #Appelée après un remplacement de nodes ou arcs: c'est une modification
+        self.version += 1
+        self.indexNodes()
+        self.indexArcs()
+        if self.distanceTable is not None: self.distanceTable.rebuild()
         
     def getNode(self, name)->Node:
         "Returns one of the graph's nodes whose name is name"
-        nodes = [n for n in self.nodes if n.name == str(name)]
+        nodes = self.nodesByName.get(str(name), [])
         if nodes == []:
             raise UnexistingElement
             return None
         else:
             if len(nodes) > 1:
-                pass
                 #Pseudo-erreur, juste à titre informatif
-                #
-                #IL FAUT RAISE UN WARNING AMBIGOUS ELT
+                warnings.warn(f'{len(nodes)} nodes are named {name}', AmbiguousElement, stacklevel=2)
             return nodes[0]
         
-    def fromFile(self, parser, fileName:str):
-        "Load the graph's data from the '../fileName' file"
-        #Parse les données selon le pattern du parser
-        parsedData = parser.parse(fileName)
-        
+    @profiled('Graph.fromFile')
+    def fromFile(self, parser, fileName:str, cache=False):
+        """Load the graph's data from the '../fileName' file
+        parser: Parser (pyparsing) or StreamParser (streaming, faster)
+        cache: reads the binary cache of the file instead when it is up to
+        date, writes it otherwise (see cachePath). Only FrozenGraph.fromFile
+        gets the full speedup (memory-mapped arrays): a Graph still builds
+        its Node and Arc objects, in about half the time of StreamParser
+        Returns False (syntax error printed, graph unchanged) if the file
+        couldn't be parsed"""
+        if cache and cacheIsValid(fileName):
+            FrozenGraph.load(cachePath(fileName)).thawInto(self)
+            return True
+        if isinstance(parser, StreamParser):
+            #Le parser en flux alimente directement le graphe
+            parsed = parser.parseInto(self, fileName)
+        else:
+            #Parse les données selon le pattern du parser
+            parsedData = parser.parse(fileName)
+            parsed = parsedData is not None
+            if parsed:
+                self.fromParsedData(parsedData)
+        #Pas de cache pour un fichier mal formé: il masquerait l'erreur aux
+        #lectures suivantes
+        if cache and parsed:
+            self.freeze().save(cachePath(fileName), fileName)
+        return parsed
+    
+    def fromParsedData(self, parsedData):
+        "Load the graph's data from the result of Parser.parse (or of one of Parser.blocks)"
         #Charge les parametres du graphe dans un dictionnaire
         #(on ne doit avoir que Name=nomDuGraphe)
         parametres = {p[0]:p[1] for p in parsedData[0]}
@@ -206,21 +488,43 @@ class Graph:
         if 'Name' in parametres:
             self.name = parametres['Name']
     
-        self.nodes = set([Node(n) for n in nodes])
-        self.arcs = set([Arc(self.getNode(a[0]), self.getNode(a[1]), float(a[2])) for a in arcs])
+        self.nodes = set()
+        self.arcs = set()
+        self.index()
+        self.addNodes([Node(n) for n in nodes])
+        #Un seul objet float par poids distinct
+        weights = dict()
+        self.addArcs([Arc(self.getNode(a[0]), self.getNode(a[1]), weights.setdefault(a[2], float(a[2]))) for a in arcs])
     
+    @classmethod
+    def graphsFromFile(cls, parser, fileName:str):
+        """Yields, lazily, a graph for each <GRAPHE> </GRAPHE> structure of the
+        '../fileName' file (see Parser.blocks and StreamParser.blocks)"""
+        for block in parser.blocks(fileName):
+            graph = cls()
+            if isinstance(parser, StreamParser):
+                parser.fill(graph, *block)
+            else:
+                graph.fromParsedData(block)
+            yield graph
+    
+    @profiled('Graph.cleanerDijkstra')
     def cleanerDijkstra(self, root):
         """cleanerDijkstra(self, n0)
         Renvoie l'arbre de parentée des sommets du graphe tel que:
             -sa racine est n0
             -tout point non atteignable n'est pas dans ce graphe"""
         
+        #Instrumentation: uniquement si un Profiler est actif
+        prof = activeProfiler
         tree = Tree()
         dist = {n:float('inf') for n in self.nodes}
         dist[root]=0
         parent = dict()
         
         while len(self.nodes-tree.nodes) > 0:
+            if prof is not None:
+                start = time.perf_counter()
             L = list(self.nodes - tree.nodes)
             nMin = L[0]
             dMin = dist[nMin]
@@ -228,15 +532,28 @@ class Graph:
                 if dist[n] <= dMin:
                     nMin = n
                     dMin = dist[n]
+            if prof is not None:
+                prof.addTime('Graph.cleanerDijkstra.selection', time.perf_counter() - start)
+                prof.count('Graph.cleanerDijkstra.candidates', len(L))
+            #Les sommets restants ne sont pas atteignables depuis root
+            if dMin == float('inf'): break
             tree.addNode(nMin)
             if nMin != root:
                 tree.addArc(Arc(parent[nMin], nMin, dist[nMin]-dist[parent[nMin]]))
             
-            for a in nMin.arcsFrom(self):
-                if a.target not in tree.nodes:
+            if prof is not None:
+                start = time.perf_counter()
+            arcs = nMin.arcsFrom(self)
+            if prof is not None:
+                prof.addTime('Graph.cleanerDijkstra.arcsFrom', time.perf_counter() - start)
+                prof.count('Graph.cleanerDijkstra.arcsScanned', len(arcs))
+                prof.count('Graph.cleanerDijkstra.settled')
+            for a in arcs:
+                if a.target not in tree.nodes and a.target in dist:
                     if dist[a.target] > dist[nMin] + a.weight:
                         dist[a.target] = dist[nMin] + a.weight
                         parent[a.target] = nMin
+                        if prof is not None: prof.count('Graph.cleanerDijkstra.relaxations')
         return tree
 
      
@@ -275,8 +592,11 @@ class Graph:
                             parent[a.target] = nMin
         return tree
 
+    @profiled('Graph.dijkstra')
     def dijkstra(self, n0):
         "Returns the dictionary of shorter paths towards all the graph's nodes"
+        #Instrumentation: uniquement si un Profiler est actif
+        prof = activeProfiler
         p0 = Path()
         p0.addNode(n0)
         
@@ -284,140 +604,1990 @@ class Graph:
         visited = set()
         paths = {n0: p0}
         while(len(toVisit) > 0):
+            if prof is not None:
+                start = time.perf_counter()
+                prof.count('Graph.dijkstra.candidates', len(paths) - len(visited))
             p = min([paths[n_] for n_ in paths if n_ not in visited])
             n = p.endingNode()
             toVisit.remove(n)
             visited.add(n)
+            if prof is not None:
+                prof.addTime('Graph.dijkstra.selection', time.perf_counter() - start)
+                start = time.perf_counter()
             
             #On notera v_ toute variable v qu'on utilise pour explorer les arcs
-            for a_ in n.arcsFrom(self):
-                #On ne parcourt que les arcs dont les sommets d'arrivées ne sont pas visités
-                if not a_.target in visited:
+            arcs_ = n.arcsFrom(self)
+            if prof is not None:
+                prof.addTime('Graph.dijkstra.arcsFrom', time.perf_counter() - start)
+                prof.count('Graph.dijkstra.arcsScanned', len(arcs_))
+            for a_ in arcs_:
+                #On ne parcourt que les arcs dont les sommets d'arrivées ne sont pas
+                #visités (ni retirés du graphe, cf. removeNode)
+                if not a_.target in visited and a_.target in self.nodes:
+                    if prof is not None:
+                        start = time.perf_counter()
                     p_ = p + a_.asPath()
+                    if prof is not None:
+                        prof.addTime('Graph.dijkstra.concatenation', time.perf_counter() - start)
+                        prof.count('Graph.dijkstra.relaxations')
                     if a_.target in toVisit:
                         if p_ < paths[a_.target]: paths[a_.target] = p_
                     else:
                         toVisit.add(a_.target)
                         paths[a_.target] = p_
+        if prof is not None:
+            prof.count('Graph.dijkstra.settled', len(visited))
                         
+        #Un seul chemin partagé pour tous les sommets non atteignables
+        pNone = NoPath(n0)
         for n in self.nodes - visited:
-            pNone = Path()
-            pNone.addNode(n0)
-            pNone.addNode(n)
             paths[n] = pNone
         
         return paths
 
-    def cleanerTable(self, BASE):
-        """Returns a 2-tensor whose column vectors are the distances from the
-        base node"""
-        parentyTrees = {node : cleanerDijkstra(node) for node in BASE}
-        #Qu'est ce qui est le plus élégant ?
-        #   -garder la convertion en chemins (structure claire et précise mais code plus long)
-        #   -travailler directement sur le graphe de parentée (syntaxe plus lourde mais pas de redondance)  
-        shortestPaths = {node0 : {node1 : parentyTrees[node0].pathTowards(node1)for node1 in BASE} for node0 in BASE}
-        text = " "*5
-        for node1 in BASE:
-            text += f'{node1.name:^5}'
-        for node0 in BASE:
-            row = f'{node2.name:^5}'
-            for node1 in BASE:
-                path = shortestPaths[node0][node1]
-                if path.isNone() or path.isNull():
-                    row += f'{"-":^5}'
-                else:
-                    row += f'{path.length():^5}'
-            text += row + '\n'
-        return text
-    
-    def matrice(self, base):
-        """Returns a 2-tensor whose column vectors are the distances from the
-        base node"""
-        M = []
-        for n0 in base:
-            paths = self.dijkstra(n0)
-            row = []
+    def cachedSearch(self, key, search):
+        """Returns search(), memoized in the LRU cache of the graph under key
+        Entries computed before the last modification of the graph are dropped"""
+        if self.distanceCache is None or self.cacheVersion != self.version:
+            self.distanceCache = OrderedDict()
+            self.cacheVersion = self.version
+        if key in self.distanceCache:
+            self.cacheHits += 1
+            self.distanceCache.move_to_end(key)
+            return self.distanceCache[key]
+        self.cacheMisses += 1
+        result = search()
+        if self.cacheSize > 0:
+            self.distanceCache[key] = result
+            while len(self.distanceCache) > self.cacheSize:
+                self.distanceCache.popitem(last=False)
+        return result
+    
+    def cacheStats(self)->dict:
+        "Returns the statistics of the shortest distances cache"
+        return {'hits': self.cacheHits, 'misses': self.cacheMisses,
+                'size': 0 if self.distanceCache is None else len(self.distanceCache),
+                'maxSize': self.cacheSize, 'version': self.version}
+    
+    def clearCache(self):
+        "Empties the shortest distances cache and resets its statistics"
+        self.distanceCache = None
+        self.cacheHits = 0
+        self.cacheMisses = 0
+    
+    def shortestDistances(self, n0, backward=False):
+        """Returns the dictionaries of shortest distances and parent arcs from n0
+        (towards n0 if backward, the arcs being followed in reverse)
+        Unreachable nodes appear in neither dictionary (their distance is inf)
+        Results are memoized until the graph is modified: they must not be
+        modified by the caller"""
+        if not n0 in self.nodes:
+            raise UnexistingElement
+        return self.cachedSearch((n0, backward, self.version), lambda: self.searchDistances(n0, backward))
+    
+    @profiled('Graph.searchDistances')
+    def searchDistances(self, n0, backward=False, targets=None):
+        """Runs the search of Graph.shortestDistances (without cache)
+        targets: stops as soon as all these nodes are settled (the distances
+        of the other nodes may then not be final)"""
+        remaining = None if targets is None else set(targets)
+        #En arrière, on suit les arcs arrivant au sommet, vers leur source
+        if backward:
+            index, end = self.arcsTowardsIndex, 'source'
+        else:
+            index, end = self.arcsFromIndex, 'target'
+        #Les arcs laissés par removeNode mènent hors du graphe: ignorés (cf. freeze)
+        nodes = self.nodes
+        dist = {n0: 0}
+        parentArcs = dict()
+        visited = set()
+        #Tas binaire de (distance, rang d'insertion, sommet): le rang départage
+        #les ex-aequo sans avoir à comparer les sommets
+        counter = itertools.count()
+        heap = [(0, next(counter), n0)]
+        while len(heap) > 0:
+            d, _, n = heapq.heappop(heap)
+            #Suppression paresseuse: une entrée dont le sommet est déjà visité
+            #est périmée, une meilleure distance a été trouvée entre temps
+            if n in visited: continue
+            visited.add(n)
+            if remaining is not None:
+                remaining.discard(n)
+                if len(remaining) == 0: break
+            
+            for a_ in index.get(n, ()):
+                d_ = d + a_.weight
+                n_ = getattr(a_, end)
+                if not n_ in visited and d_ < dist.get(n_, float('inf')) and n_ in nodes:
+                    dist[n_] = d_
+                    parentArcs[n_] = a_
+                    heapq.heappush(heap, (d_, next(counter), n_))
+        if activeProfiler is not None:
+            #Compteurs déduits après coup, pour ne rien ajouter à la boucle
+            pushes = next(counter)
+            activeProfiler.count('Graph.searchDistances.settled', len(visited))
+            activeProfiler.count('Graph.searchDistances.relaxations', pushes - 1)
+            activeProfiler.count('Graph.searchDistances.heapPushes', pushes)
+            activeProfiler.count('Graph.searchDistances.heapPops', pushes - len(heap))
+        return dist, parentArcs
+    
+    @profiled('Graph.shortestPath')
+    def shortestPath(self, source, target, bidirectional=False, oracle=None):
+        """Returns the shortest path from source to target, the search stopping
+        as soon as target is settled
+        bidirectional: searches both from source (forward) and from target
+        (backward) until the two searches can't find a shorter path
+        oracle: LandmarkOracle of the graph guiding an A* search (see Graph.landmarks)"""
+        if not (source in self.nodes and target in self.nodes):
+            raise UnexistingElement
+        if oracle is not None:
+            return oracle.shortestPath(source, target)
+        if bidirectional and source != target:
+            return self.bidirectionalPath(source, target)
+        _, parentArcs = self.searchDistances(source, targets=[target])
+        return self.rebuildPath(source, target, parentArcs)
+    
+    def distances(self, pairs, paths=False):
+        """Yields (source name, target name, distance) for each pair of node
+        names of pairs, in the same order (with the Path as a fourth element
+        if paths). Only one search is run per distinct source, stopping as
+        soon as all the targets asked from it are settled"""
+        pairs = [(str(s_), str(t_)) for s_, t_ in pairs]
+        #Chaque nom n'est cherché qu'une fois
+        nodes = dict()
+        for name in itertools.chain.from_iterable(pairs):
+            if not name in nodes: nodes[name] = self.getNode(name)
+        
+        #Cibles et nombre de paires restant à rendre par source
+        targets = dict()
+        remaining = dict()
+        for s_, t_ in pairs:
+            targets.setdefault(s_, set()).add(nodes[t_])
+            remaining[s_] = remaining.get(s_, 0) + 1
+        
+        #Recherche d'une source à sa première paire, oubliée après sa dernière
+        searches = dict()
+        for s_, t_ in pairs:
+            if not s_ in searches:
+                searches[s_] = self.searchDistances(nodes[s_], targets=targets.pop(s_))
+            dist, parentArcs = searches[s_]
+            result = (s_, t_, dist.get(nodes[t_], float('inf')))
+            if paths:
+                result += (self.rebuildPath(nodes[s_], nodes[t_], parentArcs),)
+            remaining[s_] -= 1
+            if remaining[s_] == 0: del searches[s_]
+            yield result
+    
+    def bidirectionalPath(self, source, target):
+        "Runs the bidirectional search of Graph.shortestPath"
+        #Une recherche par sens: (distances, arcs parents, sommets visités, tas,
+        #index des arcs suivis, extrémité des arcs suivis)
+        counter = itertools.count()
+        searches = [({source: 0}, dict(), set(), [(0, next(counter), source)], self.arcsFromIndex, 'target'),
+                    ({target: 0}, dict(), set(), [(0, next(counter), target)], self.arcsTowardsIndex, 'source')]
+        best, meeting = float('inf'), None
+        nodes = self.nodes
+        while len(searches[0][3]) > 0 and len(searches[1][3]) > 0:
+            #Aucun chemin passant par des sommets non visités ne peut plus
+            #battre le meilleur chemin trouvé
+            if searches[0][3][0][0] + searches[1][3][0][0] >= best: break
+            #On avance la recherche dont la frontière est la plus proche
+            side = 0 if searches[0][3][0][0] <= searches[1][3][0][0] else 1
+            dist, parentArcs, visited, heap, index, end = searches[side]
+            otherDist = searches[1-side][0]
+            d, _, n = heapq.heappop(heap)
+            if n in visited: continue
+            visited.add(n)
+            for a_ in index.get(n, ()):
+                d_ = d + a_.weight
+                n_ = getattr(a_, end)
+                if not n_ in visited and d_ < dist.get(n_, float('inf')) and n_ in nodes:
+                    dist[n_] = d_
+                    parentArcs[n_] = a_
+                    heapq.heappush(heap, (d_, next(counter), n_))
+                    if n_ in otherDist and d_ + otherDist[n_] < best:
+                        best, meeting = d_ + otherDist[n_], n_
+        
+        if meeting is None:
+            return self.rebuildPath(source, target, dict())
+        #Chemin source -> meeting, puis meeting -> target par les arcs de la
+        #recherche arrière
+        path = self.rebuildPath(source, meeting, searches[0][1])
+        node = meeting
+        while node != target:
+            arc = searches[1][1][node]
+            path.addArc(arc)
+            node = arc.target
+        return path
+    
+    def rebuildPath(self, n0, node, parentArcs):
+        """Returns the shortest path from n0 to node described by parentArcs
+        (see Graph.shortestDistances)"""
+        path = Path()
+        path.addNode(n0)
+        #Si node n'est pas atteignable, on renvoie Path([n0, node], [])
+        if not node in parentArcs:
+            path.addNode(node)
+            return path
+        arcs = []
+        while node != n0:
+            arcs.append(parentArcs[node])
+            node = arcs[-1].source
+        for arc in reversed(arcs):
+            path.addArc(arc)
+        return path
+
+    def landmarks(self, k=8):
+        """Returns the LandmarkOracle of the graph for k landmarks: bounds on
+        any distance, and A* searches (see Graph.shortestPath)"""
+        return LandmarkOracle.build(self, k)
+    
+    def trackDistances(self):
+        """Attaches to the graph a table of all the shortest distances, kept
+        up to date incrementally by the modifications of the graph (see
+        DistanceTable). matrice, cleanerTable and longestShortestPath then read it"""
+        if self.distanceTable is None:
+            self.distanceTable = DistanceTable(self)
+        return self.distanceTable
+    
+    def untrackDistances(self):
+        "Detaches the table of Graph.trackDistances"
+        self.distanceTable = None
+    
+    def baseDistances(self, base, parallel=False, processes=None, cached=True):
+        """Yields, for each node of base, the list of its distances towards
+        the nodes of base (inf if unreachable)
+        parallel: spreads the searches over a pool of processes (all the
+        cores if processes is None)
+        cached: keeps the searches in the cache of the graph (see cachedSearch)"""
+        if parallel:
+            frozen = self.freeze()
+            ids = [frozen.nodeIds[n] for n in base]
+            for row in frozen.distanceRows(ids, processes):
+                yield row[ids]
+        elif self.distanceTable is not None:
+            yield from self.distanceTable.rows(base)
+        else:
+            #Les sommets de base qu'une source ne peut atteindre (cf. condensation)
+            #restent à inf sans recherche; une source qui n'atteint qu'elle-même
+            #n'en lance aucune
+            condensation = self.condensation()
+            byComponent = dict()
             for n in base:
-                row.append(paths[n].length())
-            M.append(row)
-        return [[M[j][i] for j in range(len(M[i]))] for i in range(len(M))]
+                byComponent.setdefault(condensation.componentOf[n], []).append(n)
+            for n0 in base:
+                targets = []
+                for c in condensation.reachable(condensation.componentOf[n0]):
+                    targets.extend(byComponent.get(c, ()))
+                if len(targets) <= 1:
+                    dist = {n0: 0}
+                elif cached:
+                    dist, _ = self.shortestDistances(n0)
+                else:
+                    dist, _ = self.searchDistances(n0, targets=targets)
+                yield [dist.get(n, float('inf')) for n in base]
     
-    def longestShortestPath(self):
-        "Returns the longest shortest path of the graph"
-        maxPaths = []
+    @profiled('Graph.cleanerTable')
+    def cleanerTable(self, BASE, parallel=False, processes=None):
+        """Returns the text table of the distances between the base nodes
+        (rows: starting nodes, columns: ending nodes)"""
+        rows = self.baseDistances(BASE, parallel, processes)
+        return tableHeader(BASE) + ''.join([tableRow(node0, BASE, distances) for node0, distances in zip(BASE, rows)])
+    
+    @profiled('Graph.exportTable')
+    def exportTable(self, fileName:str, base=None, parallel=False, processes=None, pageSize=100)->list:
+        """Writes the table of the distances between the base nodes (all the
+        nodes by default) row by row, in the format given by the extension of
+        fileName, and returns the names of the written files:
+            -.txt: fixed-width text table of cleanerTable
+            -.csv: CSV (empty cell: unreachable node)
+            -.html: HTML report of pageSize rows per page
+            -.npy: float64 array (row i: distances from base[i])"""
+        if base is None:
+            base = sorted(self.nodes)
+        base = list(base)
+        #Sans cache: il garderait jusqu'à cacheSize lignes complètes
+        rows = self.baseDistances(base, parallel, processes, cached=False)
+        extension = os.path.splitext(fileName)[1].lower()
+        if extension == '.npy':
+            writeNpy(fileName, base, rows)
+        elif extension in ('.html', '.htm'):
+            return writeHtml(fileName, base, rows, pageSize, self.name)
+        elif extension in ('.txt', '.csv'):
+            with open(fileName, 'w', newline='', encoding='utf-8') as file:
+                (writeCsv if extension == '.csv' else writeText)(file, base, rows)
+        else:
+            raise ValueError(f'unknown export format {extension}')
+        return [fileName]
+    
+    @profiled('Graph.matrice')
+    def matrice(self, base, method='auto', processes=None):
+        """Returns a 2-tensor (ndarray) whose column vectors are the distances
+        from the base node
+        method: 'dijkstra' (one search per base node), 'parallel' (the same
+        searches spread over processes), 'floyd' (vectorized Floyd-Warshall
+        over the whole graph) or 'auto' (the cheapest for the size of base,
+        see chooseMatrixMethod)"""
+        if method == 'auto':
+            if self.distanceTable is not None:
+                return np.array(list(self.distanceTable.rows(base)), dtype=np.float64).T
+            method = chooseMatrixMethod(len(self.nodes), len(self.arcs), len(base))
+        if method == 'floyd':
+            #Un Floyd-Warshall par composante faiblement connexe: les blocs
+            #entre deux composantes restent à inf
+            M = np.full((len(base), len(base)), np.inf)
+            condensation = self.condensation()
+            positions = dict()
+            for i, n in enumerate(base):
+                positions.setdefault(condensation.groupOf(n), []).append(i)
+            for group, indices in positions.items():
+                frozen = self.subgraph(nodes=condensation.groups[group]).freeze()
+                M[np.ix_(indices, indices)] = frozen.matrice([frozen.nodeIds[base[i]] for i in indices], method='floyd')
+            return M
+        M = list(self.baseDistances(base, method == 'parallel', processes))
+        return np.array(M, dtype=np.float64).T
+    
+    @profiled('Graph.diameterPair')
+    def diameterPair(self)->tuple:
+        """Returns the nodes (source, target) of the longest shortest path of
+        the graph, searching only from the sources that may still beat it"""
+        if len(self.nodes) == 0:
+            raise UnexistingElement
+        #Si le graphe n'est pas fortement connexe, sa condensation donne une
+        #paire non connexe (distance infinie) sans recherche
+        pair = self.condensation().unreachablePair()
+        if pair is not None:
+            return pair
+        s = next(iter(self.nodes))
+        forward, _ = self.shortestDistances(s)
+        backward, _ = self.shortestDistances(s, backward=True)
+        
+        #Bornes de l'excentricité ecc(v) = max_y d(v, y) de chaque sommet v.
+        #Après un aller (d(s, .)) et un retour (d(., s)) depuis s:
+        #   ecc(v) >= d(v, s) et ecc(v) >= ecc(s) - d(s, v)
+        #   ecc(v) <= d(v, s) + ecc(s)
+        #Un sommet dont la borne supérieure ne dépasse pas le meilleur chemin
+        #connu est écarté sans recherche (méthode de Takes et Kosters)
+        lower = {n: 0 for n in self.nodes}
+        upper = {n: float('inf') for n in self.nodes}
+        candidates = set(self.nodes)
+        best, bestLength = None, -1
+        optimistic = True
+        while True:
+            far = max(self.nodes, key=forward.get)
+            ecc = forward[far]
+            if ecc > bestLength:
+                best, bestLength = (s, far), ecc
+            candidates.discard(s)
+            for v in list(candidates):
+                lower[v] = max(lower[v], backward[v], ecc - forward[v])
+                upper[v] = min(upper[v], backward[v] + ecc)
+                if upper[v] <= bestLength: candidates.discard(v)
+            if len(candidates) == 0:
+                return best
+            #On alterne entre le sommet le plus prometteur (plus grande borne
+            #supérieure) et le plus central (plus petite borne inférieure), dont
+            #les recherches resserrent le plus les bornes des autres
+            if optimistic:
+                s = max(candidates, key=upper.get)
+            else:
+                s = min(candidates, key=lower.get)
+            optimistic = not optimistic
+            forward, _ = self.shortestDistances(s)
+            backward, _ = self.shortestDistances(s, backward=True)
+    
+    @profiled('Graph.longestShortestPath')
+    def longestShortestPath(self, parallel=False, processes=None, pruned=True):
+        """Returns the longest shortest path of the graph
+        parallel: spreads the searches over a pool of processes
+        pruned: skips the sources that can't beat the best path found (see
+        Graph.diameterPair), otherwise searches from every node"""
+        #Graphe non fortement connexe: une paire non connexe, sans recherche
+        pair = self.condensation().unreachablePair() if len(self.nodes) > 0 else None
+        if pair is not None:
+            return self.rebuildPath(*pair, dict())
+        if parallel:
+            #Seule la source gagnante est recalculée ici, pour renvoyer un
+            #chemin fait des arcs du graphe
+            frozen = self.freeze()
+            n0, far = frozen.farthestPair(True, processes)
+            _, parentArcs = self.shortestDistances(frozen.nodes[n0])
+            return self.rebuildPath(frozen.nodes[n0], frozen.nodes[far], parentArcs)
+        if self.distanceTable is not None:
+            n0, far = self.distanceTable.farthestPair()
+            return self.rebuildPath(n0, far, self.shortestDistances(n0)[1])
+        if pruned:
+            n0, far = self.diameterPair()
+            return self.rebuildPath(n0, far, self.shortestDistances(n0)[1])
+        lsp = None
         for n0 in self.nodes:
-            paths = self.dijkstra(n0)
-            maxPaths.append(max([paths[n] for n in paths]))
-        return max(maxPaths)
+            dist, parentArcs = self.shortestDistances(n0)
+            #Comme dans dijkstra, un sommet non atteignable est à distance infinie
+            far = max(self.nodes, key=lambda n: dist.get(n, float('inf')))
+            if lsp is None or dist.get(far, float('inf')) > lspLength:
+                lsp = (n0, far, parentArcs)
+                lspLength = dist.get(far, float('inf'))
+        return self.rebuildPath(*lsp)
+    
+    def stronglyConnectedComponents(self)->list:
+        """Returns the strongly connected components of the graph (lists of
+        nodes), in reverse topological order (iterative Tarjan algorithm)"""
+        index = dict()
+        low = dict()
+        stack = []
+        onStack = set()
+        components = []
+        for root in self.nodes:
+            if root in index: continue
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            onStack.add(root)
+            #Pile d'appels explicite: (sommet, itérateur sur ses arcs sortants)
+            work = [(root, iter(self.arcsFromIndex.get(root, ())))]
+            while len(work) > 0:
+                n, arcs = work[-1]
+                for a in arcs:
+                    t = a.target
+                    if not t in self.nodes: continue
+                    if not t in index:
+                        index[t] = low[t] = len(index)
+                        stack.append(t)
+                        onStack.add(t)
+                        work.append((t, iter(self.arcsFromIndex.get(t, ()))))
+                        break
+                    elif t in onStack:
+                        low[n] = min(low[n], index[t])
+                else:
+                    #Tous les arcs de n sont explorés
+                    work.pop()
+                    if len(work) > 0:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[n])
+                    if low[n] == index[n]:
+                        component = []
+                        while True:
+                            m = stack.pop()
+                            onStack.discard(m)
+                            component.append(m)
+                            if m is n: break
+                        components.append(component)
+        return components
+    
+    def condensation(self):
+        """Returns the Condensation of the graph (its strongly connected
+        components and the DAG between them), computed once until the graph
+        is modified"""
+        if self.condensationCache is None or self.condensationVersion != self.version:
+            self.condensationCache = Condensation(self)
+            self.condensationVersion = self.version
+        return self.condensationCache
+    
+    def freeze(self):
+        """Returns a FrozenGraph compiled from the graph: nodes become dense
+        integer IDs (by name order) and arcs CSR arrays"""
+        nodes = sorted(self.nodes)
+        nodeIds = {n: i for i, n in enumerate(nodes)}
+        offsets = [0]
+        targets = []
+        weights = []
+        for n in nodes:
+            for a in self.arcsFromIndex.get(n, ()):
+                #Les arcs dont la cible n'est plus dans le graphe sont ignorés
+                if a.target in nodeIds:
+                    targets.append(nodeIds[a.target])
+                    weights.append(a.weight)
+            offsets.append(len(targets))
+        return FrozenGraph([n.name for n in nodes], offsets, targets, weights, self.name, nodes)
     
     def display(self):
         G =  gv.Digraph(self.name, filename=f'{self.name}.gv', format='svg')
         for arc in self.arcs:
             G.edge(arc.source.name, arc.target.name, label=f'{arc.weight}')
         return G
+    
+    def neighbourhood(self, nodes, hops=1, limit=None)->set:
+        """Returns the nodes at most hops arcs away from nodes, in either
+        direction (no more layers once there are limit nodes)"""
+        selected = set(nodes)
+        frontier = list(selected)
+        for _ in range(hops):
+            if limit is not None and len(selected) >= limit: break
+            layer = []
+            for n in frontier:
+                for a in self.arcsFromIndex.get(n, ()):
+                    if not a.target in selected:
+                        selected.add(a.target)
+                        layer.append(a.target)
+                for a in self.arcsTowardsIndex.get(n, ()):
+                    if not a.source in selected:
+                        selected.add(a.source)
+                        layer.append(a.source)
+            frontier = layer
+        return selected & self.nodes
+    
+    @profiled('Graph.render')
+    def render(self, path=None, hops=1, collapse=False, maxEdges=2000, fileName=None):
+        """Writes the DOT file of a readable view of the graph, arc by arc, and
+        returns it as a graphviz Source (display draws the whole graph):
+            -path: highlighted in red, with the nodes at most hops arcs away
+            from it (the whole graph if hops is None)
+            -collapse: each strongly connected component becomes one node
+            -maxEdges: the following arcs are not written (the path's ones always are)"""
+        if fileName is None:
+            fileName = f'{self.name}.gv'
+        #Sans chemin (ou sans limite de distance), on garde tout le graphe
+        if path is None or hops is None:
+            nodes = self.nodes
+        else:
+            nodes = self.neighbourhood(path.nodes, hops, maxEdges)
+        redNodes = set(path.nodes) if path is not None else set()
+        #Les arcs du chemin par (source, cible, poids): ceux d'un FrozenGraph
+        #ne sont pas les objets du graphe
+        redArcs = {(a.source.name, a.target.name, a.weight) for a in path.arcs} if path is not None else set()
+        
+        #Composante fortement connexe de chaque sommet et nom de son super-sommet
+        if collapse:
+            condensation = self.condensation()
+            components, componentOf = condensation.components, condensation.componentOf
+            ids = {i: c[0].name if len(c) == 1 else f'{min([n.name for n in c])} +{len(c) - 1}'
+                   for i, c in enumerate(components) if any([n in nodes for n in c])}
+            nodeId = lambda n: ids[componentOf[n]]
+        else:
+            nodeId = lambda n: n.name
+        
+        with open(fileName, 'w', encoding='utf-8') as file:
+            file.write(f'digraph {dotId(self.name)} {{\n')
+            for n in {nodeId(n) for n in redNodes}:
+                file.write(f'\t{dotId(n)} [color=red fontcolor=red]\n')
+            omitted = 0
+            redEdges = set()
+            if path is not None:
+                for a in path.arcs:
+                    if nodeId(a.source) != nodeId(a.target) or not collapse:
+                        redEdges.add((nodeId(a.source), nodeId(a.target)))
+                        file.write(f'\t{dotId(nodeId(a.source))} -> {dotId(nodeId(a.target))} [label="{a.weight}" color=red]\n')
+            #Super-arcs entre composantes: le plus léger des arcs regroupés,
+            #écrits à la fin (au plus maxEdges)
+            superArcs = dict()
+            edges = 0
+            for n in nodes:
+                for a in self.arcsFromIndex.get(n, ()):
+                    if not a.target in nodes or (a.source.name, a.target.name, a.weight) in redArcs: continue
+                    if collapse:
+                        edge = (nodeId(a.source), nodeId(a.target))
+                        if edge[0] == edge[1] or edge in redEdges: continue
+                        if edge in superArcs:
+                            superArcs[edge] = min(superArcs[edge], a.weight)
+                            continue
+                    if edges >= maxEdges:
+                        omitted += 1
+                    elif collapse:
+                        superArcs[edge] = a.weight
+                        edges += 1
+                    else:
+                        file.write(f'\t{dotId(a.source.name)} -> {dotId(a.target.name)} [label="{a.weight}"]\n')
+                        edges += 1
+            for (s, t), weight in superArcs.items():
+                file.write(f'\t{dotId(s)} -> {dotId(t)} [label="{weight}"]\n')
+            if omitted > 0:
+                file.write(f'\tlabel="{omitted} arcs non affichés"\n')
+            file.write('}\n')
+        return gv.Source.from_file(fileName, format='svg')
        
 class Tree(Graph):
+    """Graph in which every node but the root is reached by a single arc
+    parentArcs[n] is the arc reaching n: Root, Deepness and pathTowards go up
+    the tree without going through the arcs of each node"""
 #---Dunder methods
     def __init__(self, nodes = set(), arcs = set(), name = 'arbre'):
+        self.parentArcs = dict()
+        self.root = None
+        #Profondeurs de tous les sommets, valables tant que version n'a pas changé
+        self.depthsCache = None
+        self.depthsVersion = None
         super().__init__(nodes, arcs, name)
             
 #---Custom methods
+    def storeNode(self, node)->bool:
+        #Le premier sommet ajouté est la racine tant qu'aucun arc n'y arrive
+        if self.root is None: self.root = node
+        return super().storeNode(node)
+    
+    def indexArc(self, arc):
+        super().indexArc(arc)
+        self.parentArcs[arc.target] = arc
+    
+    def unindexArc(self, arc):
+        super().unindexArc(arc)
+        if self.parentArcs.get(arc.target) is arc:
+            del self.parentArcs[arc.target]
+            #S'il reste un arc vers arc.target, le graphe n'est pas un arbre: on le garde
+            others = self.arcsTowardsIndex.get(arc.target)
+            if others: self.parentArcs[arc.target] = next(iter(others))
+    
+    def indexArcs(self):
+        self.parentArcs = dict()
+        super().indexArcs()
+    
+    def descend(self):
+        "Yields the arcs of the tree from the root downwards, each one after the arc reaching its source"
+        stack = [self.Root()]
+        while len(stack) > 0:
+            n = stack.pop()
+            for a in self.arcsFromIndex.get(n, ()):
+                if self.parentArcs.get(a.target) is a:
+                    yield a
+                    stack.append(a.target)
+    
+    def depths(self)->dict:
+        """Returns the depth (distance from the root) of every node of the tree,
+        in one traversal, kept until the tree is modified"""
+        if self.depthsVersion != self.version:
+            depths = {self.Root(): 0}
+            for a in self.descend():
+                depths[a.target] = depths[a.source] + a.weight
+            self.depthsCache, self.depthsVersion = depths, self.version
+        return self.depthsCache
+    
+    def paths(self)->dict:
+        """Returns the path from the root towards every node of the tree, in
+        one traversal: the paths share their prefixes (see Path.extend)"""
+        p0 = Path()
+        p0.addNode(self.Root())
+        paths = {p0.startingNode(): p0}
+        for a in self.descend():
+            paths[a.target] = paths[a.source].extend(a)
+        return paths
+    
     def Deepness(self, node):
         if not node in self.nodes:
-            deepness = float('inf')
-        else:
-            deepness = 0
-            while len(node.arcsTowards(self)) == 1:
-                arc = list(node.arcsTowards(self))[0]
-                node = arc.source
-                deepness += arc.weight
-        return deepness
+            return float('inf')
+        return self.depths().get(node, float('inf'))
         
     def Root(self):
-        return [node for node in self.nodes if len(node.arcsTowards(self)) == 0][0]
+        node = self.root
+        if node is None or not node in self.nodes or node in self.parentArcs:
+            if len(self.nodes) == 0:
+                raise UnexistingElement
+            if node is None or not node in self.nodes:
+                node = next(iter(self.nodes))
+            #On remonte jusqu'à la racine (au plus len(nodes) arcs)
+            for _ in range(len(self.nodes)):
+                if not node in self.parentArcs: break
+                node = self.parentArcs[node].source
+            self.root = node
+        return self.root
     
     def pathTowards(self, node):
         if not node in self.nodes:
-            path = Path(nodes={self.Root(), node})
+            path = Path(nodes=[self.Root(), node])
         else:
+            #On remonte vers la racine, puis on construit le chemin dans l'ordre
+            arcs = []
+            while node in self.parentArcs:
+                arc = self.parentArcs[node]
+                arcs.append(arc)
+                node = arc.source
             path = Path()
             path.addNode(node)
-            while len(node.arcsTowards(self)) == 1:
-                arc = list(node.arcsTowards(self))[0]
-                node = arc.source
-                path.addNode(node)
+            for arc in reversed(arcs):
                 path.addArc(arc)
         return path
         
+class PathLink:
+    """Link of the persistent list of a Path: the last arc of a path and the
+    link of its prefix, shared by all the paths extending it"""
+    __slots__ = ('arc', 'previous', 'length', 'size')
+    
+#---Dunder methods
+    def __init__(self, arc, previous = None):
+        self.arc = arc
+        self.previous = previous
+        #Longueur et nombre d'arcs cumulés depuis le début du chemin
+        self.length = arc.weight + (previous.length if previous is not None else 0)
+        self.size = 1 + (previous.size if previous is not None else 0)
+        
 class Path(Tree):
+    """Sequence of arcs from startingNode() to endingNode(), stored as a
+    persistent linked list of PathLink: extending a path shares its prefix
+    and is O(1), as are length, startingNode and endingNode
+    The nodes and arcs of a Graph are views built on demand"""
+    #Pas d'appel à Graph.__init__: un chemin n'a pas d'index, et les caches
+    #de Graph (cf. Graph.__init__) ne sont créés qu'à leur premier usage
+    cacheSize = 128
+    distanceCache = None
+    cacheVersion = None
+    cacheHits = 0
+    cacheMisses = 0
+    distanceTable = None
+    condensationCache = None
+    condensationVersion = None
+    
 #---Dunder methods
     def __init__(self, nodes = set(), arcs = set(), name = 'chemin'):
-        super().__init__(nodes, arcs, name)
+        self.name = name
+        self.start = None
+        self.last = None
+        #Sommets ajoutés mais reliés par aucun arc (cf. isNone)
+        self.loose = []
+        #Vues nodes, arcs et index, recalculées après une modification
+        self.views = None
+        self.version = 0
+        for n in nodes:
+            self.addNode(n)
+        for a in Path.ordered(arcs):
+            self.addArc(a)
+        if activeProfiler is not None: activeProfiler.count('Path.allocated')
     
     def __lt__(self, other):
         return self.length() < other.length()   
     
+    def __add__(self, other):
+        """Concatenation of two paths, self's ending node being other's
+        starting node; union of graphs (a Graph) otherwise"""
+        if isinstance(other, NoPath):
+            return NoPath(self.start)
+        if not isinstance(other, Path) or (self.start is not None and other.start is not None
+                                           and other.start is not self.endingNode()):
+            return self.asGraph() + other
+        if self.start is None:
+            return other.copy()
+        p_ = self.copy()
+        for a in other.arcList():
+            p_.last = PathLink(a, p_.last)
+        return p_
+    
+    def __sub__(self, other):
+        "Difference of graphs (a Graph): self without the arcs of other"
+        return self.asGraph() - other
+    
 #---Custom methods
+    @staticmethod
+    def ordered(arcs)->list:
+        "Returns the arcs of a path given in any order, from the first to the last"
+        arcs = list(arcs)
+        if len(arcs) < 2:
+            return arcs
+        bySource = {a.source: a for a in arcs}
+        targets = {a.target for a in arcs}
+        starts = [a for a in arcs if a.source not in targets]
+        if len(starts) != 1 or len(bySource) != len(arcs):
+            raise IncorrectPath
+        result = starts
+        while result[-1].target in bySource:
+            result.append(bySource[result[-1].target])
+        if len(result) != len(arcs):
+            raise IncorrectPath
+        return result
+    
+    def copy(self):
+        "Returns a path sharing all of self's links"
+        p_ = Path(name = self.name)
+        p_.start = self.start
+        p_.last = self.last
+        p_.loose = list(self.loose)
+        return p_
+    
+    def asGraph(self):
+        "Returns the nodes and arcs of the path as a Graph"
+        return Graph(self.nodes, self.arcs, self.name)
+    
+    def modified(self):
+        "Drops the views and caches built before a modification of the path"
+        self.views = None
+        self.version += 1
+        if self.distanceTable is not None: self.distanceTable.rebuild()
+    
+    def arcList(self)->list:
+        "Returns the arcs of the path, in order"
+        arcs = []
+        link = self.last
+        while link is not None:
+            arcs.append(link.arc)
+            link = link.previous
+        arcs.reverse()
+        return arcs
+    
+    def nodeList(self)->list:
+        "Returns the nodes of the path, in order (followed by the unlinked ones)"
+        if self.start is None:
+            return []
+        return [self.start] + [a.target for a in self.arcList()] + self.loose
+    
+    def view(self, key):
+        "Returns the key view of the path (nodes, arcs or one of the indexes of a Graph)"
+        if self.views is None:
+            arcs = self.arcList()
+            self.views = {'nodes': set(self.nodeList()), 'arcs': set(arcs),
+                          'arcsFromIndex': {}, 'arcsTowardsIndex': {}}
+            for a in arcs:
+                self.views['arcsFromIndex'].setdefault(a.source, set()).add(a)
+                self.views['arcsTowardsIndex'].setdefault(a.target, set()).add(a)
+            self.views['parentArcs'] = {a.target: a for a in arcs}
+            self.views['nodesByName'] = {}
+            for n in self.views['nodes']:
+                self.views['nodesByName'].setdefault(n.name, []).append(n)
+        return self.views[key]
+    
+    nodes = property(lambda self: self.view('nodes'))
+    arcs = property(lambda self: self.view('arcs'))
+    arcsFromIndex = property(lambda self: self.view('arcsFromIndex'))
+    arcsTowardsIndex = property(lambda self: self.view('arcsTowardsIndex'))
+    nodesByName = property(lambda self: self.view('nodesByName'))
+    parentArcs = property(lambda self: self.view('parentArcs'))
+    
+    def addNode(self, node):
+        """Adds node to the path: the first one is its starting node, the
+        following ones stay unlinked until an arc reaches them"""
+        if self.start is None:
+            self.start = node
+        elif node is self.start or node is self.endingNode() or node in self.loose:
+            return
+        elif self.last is not None and node in self.nodes:
+            return
+        else:
+            self.loose.append(node)
+        self.modified()
+    
+    def addArc(self, arc):
+        """Extends the path by arc, which must leave its ending node (O(1))
+        or reach its starting node (O(length))"""
+        if self.start is None:
+            self.start = arc.source
+        if arc.source is self.endingNode() or (self.last is None and arc.source is self.start):
+            self.last = PathLink(arc, self.last)
+            if arc.target in self.loose: self.loose.remove(arc.target)
+        elif arc.target is self.start:
+            arcs = self.arcList()
+            self.start, self.last = arc.source, PathLink(arc)
+            for a in arcs:
+                self.last = PathLink(a, self.last)
+            if arc.source in self.loose: self.loose.remove(arc.source)
+        else:
+            raise IncorrectPath
+        self.modified()
+    
+    def extend(self, arc):
+        "Returns the path self followed by arc, sharing self's links (O(1))"
+        if arc.source is not self.endingNode():
+            raise IncorrectPath
+        p_ = Path(name = self.name)
+        p_.start = self.start
+        p_.last = PathLink(arc, self.last)
+        return p_
+    
+    def removeNode(self, node):
+        "Removes the ending node of the path (and the arc reaching it) or an unlinked node"
+        if node in self.loose:
+            self.loose.remove(node)
+        elif self.last is not None and node is self.last.arc.target:
+            self.last = self.last.previous
+        elif self.last is None and node is self.start:
+            self.start = None
+        else:
+            raise IncorrectPath
+        self.modified()
+    
+    def removeArc(self, arc):
+        "Removes the last arc of the path"
+        if self.last is None or arc is not self.last.arc:
+            raise IncorrectPath
+        self.last = self.last.previous
+        self.modified()
+    
+    def storeNode(self, node)->bool:
+        self.addNode(node)
+        return False
+    
+    def addNodes(self, nodes):
+        for n in nodes:
+            self.addNode(n)
+    
+    def storeArc(self, arc)->bool:
+        self.addArc(arc)
+        return False
+    
+    def addArcs(self, arcs):
+        for a in Path.ordered(arcs):
+            self.addArc(a)
+    
+    def setWeight(self, arc, weight):
+        "Changes the weight of one of the path's arcs (the lengths of the links after it are recomputed)"
+        if not arc in self.arcs:
+            raise UnexistingElement
+        arcs = self.arcList()
+        arc.weight = weight
+        self.last = None
+        for a in arcs:
+            self.last = PathLink(a, self.last)
+        self.modified()
+    
+    def Root(self):
+        return self.startingNode()
+    
+    def depths(self)->dict:
+        "Returns the distance from the starting node of every node of the path"
+        depths = dict()
+        link = self.last
+        while link is not None:
+            depths[link.arc.target] = link.length
+            link = link.previous
+        if self.start is not None: depths[self.start] = 0
+        return depths
+    
+    def paths(self)->dict:
+        "Returns the prefix of the path ending at each of its nodes (sharing self's links)"
+        paths = dict()
+        link = self.last
+        while link is not None:
+            p_ = Path(name = self.name)
+            p_.start, p_.last = self.start, link
+            paths[link.arc.target] = p_
+            link = link.previous
+        if self.start is not None:
+            p_ = Path(name = self.name)
+            p_.start = self.start
+            paths[self.start] = p_
+        return paths
+    
     def length(self):
         "Returns the length of the path"
         if self.isNone():
             return float('inf')
         else:
-            return sum([a.weight for a in self.arcs])
+            return self.last.length if self.last is not None else 0
         
     def startingNode(self):
         "Returns the starting node of the path"
-        return self.Root()
+        if self.start is None:
+            raise UnexistingElement
+        return self.start
     
     def endingNode(self):
         "Returns the ending node of the path"
-        return [node for node in self.nodes if len(node.arcsFrom(self)) == 0][0]
+        if self.last is not None:
+            return self.last.arc.target
+        return self.loose[-1] if self.loose else self.startingNode()
     
     def isNone(self)->bool:
-        return len(self.arcs) == 0 and len(self.nodes) == 2
+        return self.last is None and self.start is not None and len(self.loose) == 1
     
     def isNull(self)->bool:
-        return len(self.arcs) == 0 and len(self.nodes) == 1
+        return self.last is None and self.start is not None and len(self.loose) == 0
+    
+class NoPath(Path):
+    """Unreachable path (length inf) from source, shared by all the nodes
+    that source can't reach (see Graph.dijkstra): its ending node is None
+    It can't be modified, and any concatenation with it stays unreachable"""
+#---Dunder methods
+    def __init__(self, source = None, name = 'aucun chemin'):
+        super().__init__(name = name)
+        self.start = source
+    
+    def __add__(self, other):
+        return self
+    
+#---Custom methods
+    def copy(self):
+        return self
+    
+    def addNode(self, n):
+        raise IncorrectPath
+    
+    def addArc(self, a):
+        raise IncorrectPath
+    
+    def removeNode(self, n):
+        raise IncorrectPath
+    
+    def removeArc(self, a):
+        raise IncorrectPath
+    
+    def setWeight(self, arc, weight):
+        raise IncorrectPath
+    
+    def endingNode(self):
+        return None
+    
+    def isNone(self)->bool:
+        return True
+    
+    def isNull(self)->bool:
+        return False
+    
+class Condensation:
+    """Strongly connected components of a graph and the DAG between them
+    (see Graph.condensation)
+    components[c]: nodes of the c-th component, in reverse topological order
+    (a component only reaches itself and components before it)
+    groups[g]: nodes of the g-th weakly connected component"""
+#---Dunder methods
+    def __init__(self, graph):
+        self.components = graph.stronglyConnectedComponents()
+        self.componentOf = {n: c for c, component in enumerate(self.components) for n in component}
+        #Arcs du DAG entre composantes
+        self.successors = [set() for _ in self.components]
+        for c, component in enumerate(self.components):
+            for n in component:
+                for a in graph.arcsFromIndex.get(n, ()):
+                    t = self.componentOf.get(a.target)
+                    if t is not None and t != c:
+                        self.successors[c].add(t)
+        #Composantes atteignables (bits), calculées à la demande (cf. reach)
+        self.reachBits = dict()
+        #Composantes faiblement connexes: union-find sur les arcs du DAG
+        parent = list(range(len(self.components)))
+        def find(c):
+            while parent[c] != c:
+                parent[c] = parent[parent[c]]
+                c = parent[c]
+            return c
+        for c, successors in enumerate(self.successors):
+            for t in successors:
+                parent[find(c)] = find(t)
+        groupIds = dict()
+        self.componentGroups = [groupIds.setdefault(find(c), len(groupIds)) for c in range(len(self.components))]
+        self.groups = [[] for _ in groupIds]
+        for c, component in enumerate(self.components):
+            self.groups[self.componentGroups[c]].extend(component)
+    
+    def __len__(self):
+        return len(self.components)
+    
+#---Custom methods
+    def reach(self, c)->int:
+        """Returns the components reachable from the c-th one (itself
+        included), as the bits of an int"""
+        #Les successeurs d'une composante la précèdent: un parcours en
+        #profondeur du DAG suffit, chaque composante n'est calculée qu'une fois
+        work = [c]
+        while len(work) > 0:
+            c_ = work[-1]
+            if c_ in self.reachBits:
+                work.pop()
+                continue
+            missing = [t for t in self.successors[c_] if not t in self.reachBits]
+            if len(missing) > 0:
+                work.extend(missing)
+                continue
+            bits = 1 << c_
+            for t in self.successors[c_]:
+                bits |= self.reachBits[t]
+            self.reachBits[c_] = bits
+            work.pop()
+        return self.reachBits[c]
+    
+    def reachable(self, c):
+        "Yields the indices of the components reachable from the c-th one"
+        bits = self.reach(c)
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+    
+    def reaches(self, source, target)->bool:
+        "Returns True if there is a path from the source node to the target node"
+        return (self.reach(self.componentOf[source]) >> self.componentOf[target]) & 1 == 1
+    
+    def groupOf(self, n)->int:
+        "Returns the index in groups of the weakly connected component of the node n"
+        return self.componentGroups[self.componentOf[n]]
+    
+    def unreachablePair(self):
+        """Returns two nodes (source, target) such that target can't be
+        reached from source, None if the graph is strongly connected"""
+        #La première composante n'atteint aucune autre
+        if len(self.components) < 2:
+            return None
+        return self.components[0][0], self.components[1][0]
+    
+class SetView(Set):
+    "Set of a GraphView (its nodes or arcs), computed on access"
+    __slots__ = ('contains', 'iterate', 'count')
+    
+#---Dunder methods
+    def __init__(self, contains, iterate, count):
+        self.contains = contains
+        self.iterate = iterate
+        self.count = count
+    
+    def __contains__(self, x):
+        return self.contains(x)
+    
+    def __iter__(self):
+        return self.iterate()
+    
+    def __len__(self):
+        return self.count()
+    
+#---Custom methods
+    @classmethod
+    def _from_iterable(cls, iterable):
+        #Les opérations ensemblistes (-, |, &) renvoient un vrai ensemble
+        return set(iterable)
+    
+class IndexView(Mapping):
+    "Index of a GraphView (node -> arcs, or name -> nodes), computed on access"
+    __slots__ = ('find', 'iterate')
+    
+#---Dunder methods
+    def __init__(self, find, iterate):
+        self.find = find
+        self.iterate = iterate
+    
+    def __getitem__(self, key):
+        values = self.find(key)
+        if len(values) == 0:
+            raise KeyError(key)
+        return values
+    
+    def __iter__(self):
+        return self.iterate()
+    
+    def __len__(self):
+        return sum([1 for _ in self.iterate()])
+    
+class GraphView(Graph):
+    """Read-only graph seen through other graphs (union, difference or
+    filtered subgraph) without copying their nodes and arcs: nodes, arcs and
+    the indexes are computed on access, so dijkstra, cleanerDijkstra, display
+    or Node.arcsFrom read it as a Graph. materialize returns a copy"""
+#---Dunder methods
+    def __init__(self, graphs, name = 'vue'):
+        #Pas d'appel à Graph.__init__: ni ensembles ni index propres
+        self.graphs = graphs
+        self.name = name
+        self.nodes = SetView(self.hasNode, self.iterNodes, self.countNodes)
+        self.arcs = SetView(self.hasArc, self.iterArcs, self.countArcs)
+        self.arcsFromIndex = IndexView(self.arcsFromNode, self.iterNodes)
+        self.arcsTowardsIndex = IndexView(self.arcsTowardsNode, self.iterNodes)
+        self.nodesByName = IndexView(self.nodesNamed, lambda: iter({n.name for n in self.nodes}))
+        #Cache LRU des recherches (cf. cachedSearch), invalidé par une
+        #modification de l'un des graphes vus
+        self.cacheSize = 128
+        self.distanceCache = None
+        self.cacheVersion = None
+        self.cacheHits = 0
+        self.cacheMisses = 0
+        self.distanceTable = None
+        self.condensationCache = None
+        self.condensationVersion = None
+    
+    def __add__(self, other):
+        return UnionView(self, other)
+    
+    def __sub__(self, other):
+        return DifferenceView(self, other)
+    
+#---Custom methods
+    @property
+    def version(self):
+        return tuple([getattr(g, 'version', 0) for g in self.graphs])
+    
+    def countNodes(self)->int:
+        return sum([1 for _ in self.iterNodes()])
+    
+    def countArcs(self)->int:
+        return sum([1 for _ in self.iterArcs()])
+    
+    def materialize(self)->Graph:
+        "Returns a Graph holding (a copy of) the nodes and arcs of the view"
+        return Graph(set(self.nodes), set(self.arcs), self.name)
+    
+    def storeNode(self, node):
+        raise ReadOnlyGraph
+    
+    def removeNode(self, node):
+        raise ReadOnlyGraph
+    
+    def storeArc(self, arc):
+        raise ReadOnlyGraph
+    
+    def removeArc(self, arc):
+        raise ReadOnlyGraph
+    
+    def setWeight(self, arc, weight):
+        raise ReadOnlyGraph
+    
+    def index(self):
+        raise ReadOnlyGraph
+    
+    def fromFile(self, parser, fileName:str, cache=False):
+        raise ReadOnlyGraph
+    
+    def trackDistances(self):
+        raise ReadOnlyGraph
+    
+class UnionView(GraphView):
+    "Nodes and arcs of first or second (see Graph.union)"
+#---Dunder methods
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+        super().__init__([first, second], first.name + '+' + second.name)
+    
+#---Custom methods
+    def hasNode(self, node)->bool:
+        return node in self.first.nodes or node in self.second.nodes
+    
+    def iterNodes(self):
+        yield from self.first.nodes
+        for n in self.second.nodes:
+            if not n in self.first.nodes: yield n
+    
+    def nodesNamed(self, name)->list:
+        nodes = list(self.first.nodesByName.get(name, []))
+        return nodes + [n for n in self.second.nodesByName.get(name, []) if not n in self.first.nodes]
+    
+    def hasArc(self, arc)->bool:
+        return arc in self.first.arcs or arc in self.second.arcs
+    
+    def iterArcs(self):
+        yield from self.first.arcs
+        for a in self.second.arcs:
+            if not a in self.first.arcs: yield a
+    
+    def arcsFromNode(self, node)->list:
+        arcs = list(self.first.arcsFromIndex.get(node, ()))
+        return arcs + [a for a in self.second.arcsFromIndex.get(node, ()) if not a in self.first.arcs]
+    
+    def arcsTowardsNode(self, node)->list:
+        arcs = list(self.first.arcsTowardsIndex.get(node, ()))
+        return arcs + [a for a in self.second.arcsTowardsIndex.get(node, ()) if not a in self.first.arcs]
+    
+class DifferenceView(UnionView):
+    """Nodes of graph or other, arcs of graph that are not arcs of other (see
+    Graph.difference): its sizes cost O(size of other)"""
+#---Dunder methods
+    def __init__(self, graph, other):
+        super().__init__(graph, other)
+        self.name = graph.name + '-' + other.name
+    
+#---Custom methods
+    def countNodes(self)->int:
+        return len(self.first.nodes) + sum([1 for n in self.second.nodes if not n in self.first.nodes])
+    
+    def hasArc(self, arc)->bool:
+        return arc in self.first.arcs and not arc in self.second.arcs
+    
+    def iterArcs(self):
+        for a in self.first.arcs:
+            if not a in self.second.arcs: yield a
+    
+    def countArcs(self)->int:
+        return len(self.first.arcs) - sum([1 for a in self.second.arcs if a in self.first.arcs])
+    
+    def arcsFromNode(self, node)->list:
+        return [a for a in self.first.arcsFromIndex.get(node, ()) if not a in self.second.arcs]
+    
+    def arcsTowardsNode(self, node)->list:
+        return [a for a in self.first.arcsTowardsIndex.get(node, ()) if not a in self.second.arcs]
+    
+class SubgraphView(GraphView):
+    """Nodes and arcs of graph kept by a filter (see Graph.subgraph): only the
+    given nodes and arcs if any, without the excluded ones, an arc being kept
+    only with both its ends. Without nodes nor arcs, its sizes cost
+    O(size of the excluded sets and arcs of the excluded nodes)"""
+#---Dunder methods
+    def __init__(self, graph, nodes = None, arcs = None, excludedNodes = (), excludedArcs = ()):
+        self.graph = graph
+        self.keptNodes = None if nodes is None else set(nodes)
+        self.keptArcs = None if arcs is None else set(arcs)
+        self.excludedNodes = set(excludedNodes)
+        self.excludedArcs = set(excludedArcs)
+        super().__init__([graph], graph.name)
+    
+#---Custom methods
+    def hasNode(self, node)->bool:
+        return (node in self.graph.nodes and not node in self.excludedNodes
+                and (self.keptNodes is None or node in self.keptNodes))
+    
+    def iterNodes(self):
+        for n in self.graph.nodes if self.keptNodes is None else self.keptNodes:
+            if self.hasNode(n): yield n
+    
+    def countNodes(self)->int:
+        if self.keptNodes is not None:
+            return super().countNodes()
+        return len(self.graph.nodes) - sum([1 for n in self.excludedNodes if n in self.graph.nodes])
+    
+    def nodesNamed(self, name)->list:
+        return [n for n in self.graph.nodesByName.get(name, []) if self.hasNode(n)]
+    
+    def hasArc(self, arc)->bool:
+        return (arc in self.graph.arcs and not arc in self.excludedArcs
+                and (self.keptArcs is None or arc in self.keptArcs)
+                and self.hasNode(arc.source) and self.hasNode(arc.target))
+    
+    def iterArcs(self):
+        if self.keptArcs is not None:
+            arcs = self.keptArcs
+        elif self.keptNodes is not None:
+            #Les arcs partant des sommets gardés, sans parcourir tout le graphe
+            arcs = (a for n in self.iterNodes() for a in self.graph.arcsFromIndex.get(n, ()))
+        else:
+            arcs = self.graph.arcs
+        for a in arcs:
+            if self.hasArc(a): yield a
+    
+    def countArcs(self)->int:
+        if self.keptNodes is not None or self.keptArcs is not None:
+            return super().countArcs()
+        #Arcs du graphe retirés: les exclus et ceux des sommets exclus
+        removed = {a for a in self.excludedArcs if a in self.graph.arcs}
+        for n in self.excludedNodes:
+            if n in self.graph.nodes:
+                removed.update(self.graph.arcsFromIndex.get(n, ()))
+                removed.update(self.graph.arcsTowardsIndex.get(n, ()))
+        return len(self.graph.arcs) - len(removed)
+    
+    def arcsFromNode(self, node)->list:
+        if not self.hasNode(node):
+            return []
+        return [a for a in self.graph.arcsFromIndex.get(node, ()) if self.hasArc(a)]
+    
+    def arcsTowardsNode(self, node)->list:
+        if not self.hasNode(node):
+            return []
+        return [a for a in self.graph.arcsTowardsIndex.get(node, ()) if self.hasArc(a)]
+    
+class DistanceTable:
+    """Table of all the shortest distances of a graph (D[i, j]: distance from
+    nodes[i] to nodes[j]), updated incrementally when the graph changes:
+        -an added arc (or a lighter one) only updates the pairs it shortens
+        -a removed arc (or a heavier one) only triggers a new search from the
+        sources whose shortest paths could go through it"""
+#---Dunder methods
+    def __init__(self, graph):
+        self.graph = graph
+        self.rebuild()
+    
+#---Custom methods
+    def rebuild(self):
+        "Recomputes the whole table"
+        self.nodes = sorted(self.graph.nodes)
+        self.ids = {n: i for i, n in enumerate(self.nodes)}
+        self.D = np.full((len(self.nodes), len(self.nodes)), np.inf)
+        for i in range(len(self.nodes)):
+            self.searchFrom(i)
+    
+    def searchFrom(self, i):
+        "Recomputes the row of the i-th node"
+        dist, _ = self.graph.shortestDistances(self.nodes[i])
+        self.D[i] = np.inf
+        for n, d in dist.items():
+            if n in self.ids: self.D[i, self.ids[n]] = d
+    
+    def nodeAdded(self, node):
+        "Updates the table after node was added to the graph"
+        if node in self.graph.arcsFromIndex or node in self.graph.arcsTowardsIndex:
+            #Le sommet porte déjà des arcs (restés après un removeNode)
+            self.rebuild()
+            return
+        self.ids[node] = len(self.nodes)
+        self.nodes.append(node)
+        V = len(self.nodes)
+        D = np.full((V, V), np.inf)
+        D[:-1, :-1] = self.D
+        D[-1, -1] = 0
+        self.D = D
+    
+    def arcAdded(self, arc):
+        "Updates the table after arc was added to the graph (or made lighter)"
+        if not (arc.source in self.ids and arc.target in self.ids):
+            self.rebuild()
+            return
+        u, v, w = self.ids[arc.source], self.ids[arc.target], arc.weight
+        D = self.D
+        #(x, y) ne raccourcit que si x gagne à passer par l'arc pour aller en v
+        #et si y gagne à être atteint par l'arc depuis u
+        rows = np.nonzero(D[:, u] + w < D[:, v])[0]
+        cols = np.nonzero(w + D[v, :] < D[u, :])[0]
+        if len(rows) > 0 and len(cols) > 0:
+            block = np.ix_(rows, cols)
+            D[block] = np.minimum(D[block], D[rows, u, None] + w + D[None, v, cols])
+    
+    def arcRemoved(self, source, target, weight):
+        """Updates the table after an arc (source, target, weight) was removed
+        from the graph (or made heavier than weight)"""
+        if not (source in self.ids and target in self.ids):
+            self.rebuild()
+            return
+        u, v = self.ids[source], self.ids[target]
+        #Seules les sources dont un plus court chemin peut emprunter l'arc
+        #(D[s, u] + weight == D[s, v]) sont à recalculer
+        reached = np.isfinite(self.D[:, v])
+        tight = np.isclose(self.D[:, u] + weight, self.D[:, v])
+        for i in np.nonzero(reached & tight)[0]:
+            self.searchFrom(i)
+    
+    def distance(self, n0, n1):
+        "Returns the shortest distance from n0 to n1"
+        return self.D[self.ids[n0], self.ids[n1]]
+    
+    def rows(self, base):
+        """Yields, for each node of base, the array of its distances towards
+        the nodes of base"""
+        ids = [self.ids[n] for n in base]
+        for i in ids:
+            yield self.D[i, ids]
+    
+    def farthestPair(self)->tuple:
+        "Returns the nodes (source, target) of the longest shortest path"
+        i, j = np.unravel_index(np.argmax(self.D), self.D.shape)
+        return self.nodes[i], self.nodes[j]
+    
+class LandmarkOracle:
+    """Shortest distances from and towards k landmark nodes of a graph (ALT):
+    by the triangle inequality, they bound any distance in O(k), and guide
+    an A* search towards its target (see LandmarkOracle.shortestPath)
+    forward[l, i]: distance from landmarks[l] to nodes[i], backward[l, i]:
+    distance from nodes[i] to landmarks[l] (inf if unreachable)
+    The bounds hold for the graph as it was when the oracle was built: once
+    it is modified, bounds and shortestPath fall back to plain searches"""
+#---Dunder methods
+    def __init__(self, graph, landmarks, forward, backward):
+        self.graph = graph
+        #Version du graphe pour laquelle les distances aux repères sont exactes
+        self.version = graph.version
+        #Sommets par ordre de nom, comme Graph.freeze
+        self.nodes = sorted(graph.nodes)
+        self.ids = {n: i for i, n in enumerate(self.nodes)}
+        self.landmarks = np.asarray(landmarks, dtype=np.int64)
+        self.forward = np.asarray(forward, dtype=np.float64)
+        self.backward = np.asarray(backward, dtype=np.float64)
+        #rows[i] = (-forward[:, i], backward[:, i]): la borne inférieure de s
+        #à t est le max de rows[s] - rows[t] (cf. lowerBound), une seule
+        #ligne contiguë de 2k distances par sommet
+        self.rows = np.ascontiguousarray(np.concatenate([-self.forward, self.backward]).T)
+    
+#---Custom methods
+    @classmethod
+    @profiled('LandmarkOracle.build')
+    def build(cls, graph, k=8):
+        """Returns the oracle of graph for k landmarks chosen by farthest
+        point: each new landmark is the node farthest from (or towards) the
+        ones already chosen, the nodes they can't reach coming first"""
+        nodes = sorted(graph.nodes)
+        k = min(k, len(nodes))
+        landmarks = []
+        forward = np.empty((k, len(nodes)))
+        backward = np.empty((k, len(nodes)))
+        #Distance de chaque sommet aux repères choisis (inf: aucun ne le relie)
+        closest = np.full(len(nodes), np.inf)
+        #Premier repère: le sommet le plus éloigné d'un sommet quelconque
+        if k > 0:
+            dist, _ = graph.searchDistances(nodes[0])
+            landmarks.append(max(range(len(nodes)), key=lambda i: dist.get(nodes[i], float('inf'))))
+        for l in range(k):
+            for distances, backwardSearch in ((forward, False), (backward, True)):
+                dist, _ = graph.searchDistances(nodes[landmarks[l]], backward=backwardSearch)
+                distances[l] = [dist.get(n, float('inf')) for n in nodes]
+            closest = np.minimum(closest, np.minimum(forward[l], backward[l]))
+            if l + 1 < k:
+                landmarks.append(int(np.argmax(closest)))
+        return cls(graph, landmarks, forward, backward)
+    
+    def isStale(self)->bool:
+        "Returns True if the graph was modified since the oracle was built (see build)"
+        return self.graph.version != self.version
+    
+    def save(self, path:str):
+        "Writes the oracle to the path file (.npz, numpy arrays)"
+        if self.isStale():
+            raise ValueError('the graph was modified since the oracle was built')
+        np.savez(path, names=np.array([n.name for n in self.nodes]), landmarks=self.landmarks,
+                 forward=self.forward, backward=self.backward)
+    
+    @classmethod
+    def load(cls, path:str, graph):
+        """Returns the oracle saved in the path file (see save) for graph, which
+        must not have been modified since"""
+        with np.load(path) as data:
+            if list(data['names']) != [n.name for n in sorted(graph.nodes)]:
+                raise ValueError(f'{path} was built for another graph')
+            return cls(graph, data['landmarks'], data['forward'], data['backward'])
+    
+    def bounds(self, source, target)->tuple:
+        """Returns (lower, upper) bounds of the distance from source to target:
+            -lower: max over the landmarks L of d(L, t) - d(L, s) and d(s, L) - d(t, L)
+            -upper: min over the landmarks L of d(s, L) + d(L, t)
+        The exact distance (searched) if the graph was modified"""
+        if self.isStale():
+            d = float(self.graph.searchDistances(source, targets=[target])[0].get(target, float('inf')))
+            return d, d
+        s, t = self.ids[source], self.ids[target]
+        if s == t:
+            return 0, 0
+        with np.errstate(invalid='ignore'):
+            return self.lowerBound(s, t), float(np.min(self.backward[:, s] + self.forward[:, t]))
+    
+    def lowerBound(self, s, t)->float:
+        "Returns the lower bound of the distance between the IDs s and t (inf: t unreachable from s)"
+        #inf - inf (repère qui ne relie aucun des deux) ne borne rien: fmax
+        #ignore ces nan (les appelants masquent l'avertissement de numpy)
+        return float(np.fmax.reduce(self.rows[s] - self.rows[t], initial=0.0))
+    
+    @profiled('LandmarkOracle.shortestPath')
+    def shortestPath(self, source, target):
+        """Returns the shortest path from source to target (as
+        Graph.shortestPath) by an A* search: the nodes are settled by
+        distance from source + lower bound towards target
+        A plain search if the graph was modified (the bounds may be wrong)"""
+        graph = self.graph
+        if not (source in graph.nodes and target in graph.nodes):
+            raise UnexistingElement
+        if self.isStale():
+            return graph.rebuildPath(source, target, graph.searchDistances(source, targets=[target])[1])
+        t = self.ids[target]
+        #Borne inférieure de chaque sommet rencontré vers target (inf: il ne
+        #peut pas l'atteindre, inutile de l'explorer)
+        heuristic = dict()
+        def h(n):
+            if not n in heuristic:
+                heuristic[n] = self.lowerBound(self.ids[n], t) if n in self.ids else 0
+            return heuristic[n]
+        dist = {source: 0}
+        parentArcs = dict()
+        visited = set()
+        counter = itertools.count()
+        with np.errstate(invalid='ignore'):
+            heap = [(h(source), next(counter), source)]
+            while len(heap) > 0:
+                _, _, n = heapq.heappop(heap)
+                if n in visited: continue
+                visited.add(n)
+                if n == target: break
+                d = dist[n]
+                for a_ in graph.arcsFromIndex.get(n, ()):
+                    d_ = d + a_.weight
+                    n_ = a_.target
+                    if not n_ in visited and d_ < dist.get(n_, float('inf')) and n_ in graph.nodes:
+                        dist[n_] = d_
+                        parentArcs[n_] = a_
+                        if h(n_) < float('inf'):
+                            heapq.heappush(heap, (d_ + h(n_), next(counter), n_))
+        if activeProfiler is not None:
+            activeProfiler.count('LandmarkOracle.shortestPath.settled', len(visited))
+            activeProfiler.count('LandmarkOracle.shortestPath.heapPushes', next(counter))
+        if not target in visited:
+            parentArcs = dict()
+        return graph.rebuildPath(source, target, parentArcs)
+    
+class FrozenGraph:
+    """Read-only compact graph: node i has the name names[i] and its arcs are
+    the indices k in range(offsets[i], offsets[i+1]), going to targets[k]
+    with the weight weights[k] (CSR representation)"""
+#---Dunder methods
+    def __init__(self, names, offsets, targets, weights, name='graphe', nodes=None):
+        self.name = name
+        self.names = list(names)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        #Objets Node associés aux IDs (uniquement pour construire des Path) et
+        #index des noms: créés à la première utilisation, pour qu'un graphe
+        #chargé depuis le cache soit disponible immédiatement
+        self.nodeObjects = list(nodes) if nodes is not None else None
+        self.nodeIdsIndex = None
+        self.idsIndex = None
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    @property
+    def nodes(self)->list:
+        "Node objects associated with the IDs"
+        if self.nodeObjects is None:
+            self.nodeObjects = [Node(n) for n in self.names]
+        return self.nodeObjects
+    
+    @property
+    def nodeIds(self)->dict:
+        "Dictionary of the IDs of the Node objects"
+        if self.nodeIdsIndex is None:
+            self.nodeIdsIndex = {n: i for i, n in enumerate(self.nodes)}
+        return self.nodeIdsIndex
+    
+    @property
+    def ids(self)->dict:
+        "Dictionary of the IDs by name (first node of each name)"
+        if self.idsIndex is None:
+            self.idsIndex = dict()
+            for i, n in enumerate(self.names):
+                self.idsIndex.setdefault(n, i)
+        return self.idsIndex
+    
+#---Custom methods
+    @classmethod
+    def fromFile(cls, parser, fileName:str, cache=True):
+        """Returns the FrozenGraph of the '../fileName' file, memory-mapped
+        from its cache if it is up to date (see cachePath)"""
+        if cache and cacheIsValid(fileName):
+            return cls.load(cachePath(fileName))
+        #Les deux parsers affichent l'erreur de syntaxe et laissent le graphe vide
+        graph = Graph()
+        parsed = graph.fromFile(parser, fileName)
+        frozen = graph.freeze()
+        #Pas de cache pour un fichier mal formé (cf. Graph.fromFile)
+        if cache and parsed:
+            frozen.save(cachePath(fileName), fileName)
+        return frozen
+    
+    @classmethod
+    def load(cls, path:str):
+        "Returns the FrozenGraph saved in the path file, its arrays being memory-mapped"
+        header, start = readCacheHeader(path)
+        V, E = header['nodes'], header['arcs']
+        with open(path, 'rb') as file:
+            file.seek(start)
+            names = file.read(header['namesSize']).decode('utf-8')
+        start += header['namesSize']
+        start += -start % 8
+        offsets = np.memmap(path, np.int64, 'r', start, (V+1,))
+        targets = np.memmap(path, np.int32, 'r', start + 8*(V+1), (E,))
+        weights = np.memmap(path, np.float64, 'r', start + 8*(V+1) + 4*E + 4*(E % 2), (E,))
+        return cls(names.split('\n') if V > 0 else [], offsets, targets, weights, header['name'])
+    
+    def save(self, path:str, source=None):
+        """Saves the graph in the binary path file
+        source: name of the file the graph comes from, whose size, date and
+        hash are kept to detect when the cache becomes outdated"""
+        header = {'version': CACHE_VERSION, 'name': self.name,
+                  'nodes': len(self), 'arcs': len(self.targets),
+                  'source': sourceStamp(source) if source is not None else None}
+        names = '\n'.join(self.names).encode('utf-8')
+        header['namesSize'] = len(names)
+        headerBytes = json.dumps(header).encode('utf-8')
+        #Ecriture dans un fichier temporaire puis renommage: un cache n'est
+        #jamais lu à moitié écrit
+        with open(path + '.tmp', 'wb') as file:
+            file.write(CACHE_MAGIC + len(headerBytes).to_bytes(8, 'little') + headerBytes + names)
+            #Les tableaux commencent sur des multiples de 8 octets
+            file.write(bytes(-file.tell() % 8))
+            file.write(self.offsets.astype(np.int64).tobytes())
+            file.write(self.targets.astype(np.int32).tobytes())
+            file.write(bytes(4*(len(self.targets) % 2)))
+            file.write(self.weights.astype(np.float64).tobytes())
+        os.replace(path + '.tmp', path)
+    
+    def thaw(self)->Graph:
+        "Returns the Graph (Node and Arc objects) equivalent to the FrozenGraph"
+        graph = Graph(name=self.name)
+        self.thawInto(graph)
+        return graph
+    
+    def thawInto(self, graph):
+        """Replaces the content of graph by the nodes and arcs of the
+        FrozenGraph, building its indexes in the same pass (see Graph.index)"""
+        nodes = self.nodes
+        offsets = self.offsets.tolist()
+        sourceNodes = [nodes[s] for s in np.repeat(np.arange(len(self)), np.diff(self.offsets)).tolist()]
+        targetNodes = [nodes[t] for t in self.targets.tolist()]
+        weights = self.weights.tolist()
+        arcs = list(map(Arc, sourceNodes, targetNodes, weights))
+        #Les arcs d'un sommet sont contigus (CSR): arcsFromIndex s'en déduit
+        #sans passer par indexArc
+        arcsFrom = {n: set(arcs[offsets[i]:offsets[i+1]]) for i, n in enumerate(nodes) if offsets[i] < offsets[i+1]}
+        arcsTowards = dict()
+        for a in arcs:
+            towards = arcsTowards.get(a.target)
+            if towards is None:
+                arcsTowards[a.target] = {a}
+            else:
+                towards.add(a)
+        graph.name = self.name
+        graph.nodes = set(nodes)
+        graph.arcs = set(arcs)
+        if type(graph).indexArc is not Graph.indexArc:
+            #Index propres à la sous-classe (cf. Tree.indexArc)
+            graph.index()
+            return
+        graph.version += 1
+        graph.indexNodes()
+        graph.arcsFromIndex, graph.arcsTowardsIndex = arcsFrom, arcsTowards
+        graph.arcKeys = dict(Counter(zip(sourceNodes, targetNodes, weights)))
+        if graph.distanceTable is not None: graph.distanceTable.rebuild()
+    
+    def getId(self, name)->int:
+        "Returns the ID of one of the graph's nodes whose name is name"
+        if not str(name) in self.ids:
+            raise UnexistingElement
+        return self.ids[str(name)]
+    
+    def arcSource(self, k)->int:
+        "Returns the ID of the source node of the k-th arc"
+        return int(np.searchsorted(self.offsets, k, side='right')) - 1
+    
+    @profiled('FrozenGraph.shortestDistances')
+    def shortestDistances(self, source):
+        """Returns the arrays of shortest distances and parent arcs from the
+        node whose ID is source (inf and -1 for unreachable nodes)"""
+        if not 0 <= source < len(self):
+            raise UnexistingElement
+        offsets = self.offsets
+        targets = self.targets
+        weights = self.weights
+        inf = float('inf')
+        #Listes Python pendant la recherche: plus rapides que l'accès élément
+        #par élément aux tableaux NumPy
+        dist = [inf]*len(self)
+        parentArcs = [-1]*len(self)
+        visited = [False]*len(self)
+        dist[source] = 0
+        heap = [(0, source)]
+        while len(heap) > 0:
+            d, n = heapq.heappop(heap)
+            if visited[n]: continue
+            visited[n] = True
+            lo, hi = int(offsets[n]), int(offsets[n+1])
+            for k, t, w in zip(range(lo, hi), targets[lo:hi].tolist(), weights[lo:hi].tolist()):
+                if not visited[t] and d + w < dist[t]:
+                    dist[t] = d + w
+                    parentArcs[t] = k
+                    heapq.heappush(heap, (d + w, t))
+        return np.array(dist), np.array(parentArcs, dtype=np.int64)
+    
+    def rebuildPath(self, source, target, parentArcs):
+        """Returns the shortest path (as a Path) from source to target
+        described by parentArcs (see FrozenGraph.shortestDistances)"""
+        path = Path()
+        path.addNode(self.nodes[source])
+        if parentArcs[target] < 0:
+            path.addNode(self.nodes[target])
+            return path
+        arcs = []
+        while target != source:
+            k = int(parentArcs[target])
+            node = self.arcSource(k)
+            arcs.append(Arc(self.nodes[node], self.nodes[target], float(self.weights[k])))
+            target = node
+        for arc in reversed(arcs):
+            path.addArc(arc)
+        return path
+    
+    def weightMatrix(self):
+        """Returns the V*V matrix of the lightest arc weights between nodes
+        (0 on the diagonal, inf where there is no arc)"""
+        W = np.full((len(self), len(self)), np.inf)
+        sources = np.repeat(np.arange(len(self)), np.diff(self.offsets))
+        np.minimum.at(W, (sources, self.targets), self.weights)
+        np.fill_diagonal(W, 0)
+        return W
+    
+    @profiled('FrozenGraph.floydWarshall')
+    def floydWarshall(self):
+        """Returns the V*V matrix of all the shortest distances (row: starting
+        node, column: ending node)"""
+        D = self.weightMatrix()
+        #Une mise à jour min-plus vectorisée par pivot k. La ligne et la colonne
+        #k ne changent pas pendant l'itération (D[k, k] == 0), d'où la mise à
+        #jour en place
+        for k in range(len(self)):
+            np.minimum(D, D[:, k, None] + D[None, k, :], out=D)
+        return D
+    
+    @profiled('FrozenGraph.matrice')
+    def matrice(self, base, method='auto', processes=None):
+        """Returns a 2-tensor (ndarray) whose column vectors are the distances
+        from the base node IDs (see Graph.matrice for method)"""
+        base = np.asarray(base, dtype=np.int64)
+        if method == 'auto':
+            method = chooseMatrixMethod(len(self), len(self.targets), len(base))
+        if method == 'floyd':
+            return self.floydWarshall()[np.ix_(base, base)].T
+        if method == 'parallel':
+            return np.array([row[base] for row in self.distanceRows(base, processes)]).T
+        return np.array([self.shortestDistances(n0)[0][base] for n0 in base]).T
+    
+    def mapSources(self, function, sources, processes=None):
+        """Yields function(source) for each source (in order), computed by a
+        pool of processes sharing the CSR arrays of the graph"""
+        sources = [int(s) for s in sources]
+        if processes is None:
+            processes = os.cpu_count()
+        #Des paquets de sources pour limiter les échanges entre processus
+        chunksize = max(1, len(sources) // (4*processes))
+        #Les tableaux sont hérités par les processus (fork) ou leur sont
+        #transmis une seule fois à leur création (spawn), jamais par source
+        with mp.Pool(processes, initializer=initWorker,
+                     initargs=(self.offsets, self.targets, self.weights)) as pool:
+            yield from pool.imap(function, sources, chunksize)
+    
+    def distanceRows(self, sources, processes=None):
+        """Yields the array of the shortest distances from each source,
+        computed in parallel"""
+        yield from self.mapSources(distanceRow, sources, processes)
+    
+    def farthestPair(self, parallel=False, processes=None)->tuple:
+        """Returns the IDs (source, target) of the longest shortest path of
+        the graph"""
+        if parallel:
+            farthest = self.mapSources(farthestNode, range(len(self)), processes)
+        else:
+            farthest = (farthestNode(n0, self) for n0 in range(len(self)))
+        pair = None
+        for n0, (far, d) in enumerate(farthest):
+            if pair is None or d > pairLength:
+                pair = (n0, far)
+                pairLength = d
+        return pair
+    
+    @profiled('FrozenGraph.longestShortestPath')
+    def longestShortestPath(self, parallel=False, processes=None):
+        "Returns the longest shortest path of the graph"
+        n0, far = self.farthestPair(parallel, processes)
+        return self.rebuildPath(n0, far, self.shortestDistances(n0)[1])
+    
+#CACHE BINAIRE DES GRAPHES
+#Fichier: CACHE_MAGIC, taille de l'en-tête (8 octets), en-tête JSON, noms des
+#sommets séparés par des '\n', puis alignés sur 8 octets les tableaux offsets
+#(int64), targets (int32) et weights (float64) d'un FrozenGraph
+CACHE_MAGIC = b'GRAPHECSR'
+CACHE_VERSION = 1
+
+def cachePath(fileName:str)->str:
+    "Returns the name of the cache file of the '../fileName' file"
+    return fileName + '.csr'
+
+def sourceStamp(fileName:str, hashed=True)->dict:
+    "Returns the size, modification date and (if hashed) SHA-256 of a file"
+    stat = os.stat(fileName)
+    stamp = {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+    if hashed:
+        sha = hashlib.sha256()
+        with open(fileName, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                sha.update(chunk)
+        stamp['sha256'] = sha.hexdigest()
+    return stamp
+
+def readCacheHeader(path:str):
+    "Returns the header of a cache file and the position of the data following it"
+    with open(path, 'rb') as file:
+        if file.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+            raise ValueError(f'{path} is not a graph cache')
+        size = int.from_bytes(file.read(8), 'little')
+        header = json.loads(file.read(size).decode('utf-8'))
+    return header, len(CACHE_MAGIC) + 8 + size
+
+def cacheIsValid(fileName:str)->bool:
+    "Returns True if the cache of the '../fileName' file exists and is up to date"
+    try:
+        header, _ = readCacheHeader(cachePath(fileName))
+    except (OSError, ValueError):
+        return False
+    source = header['source']
+    if header['version'] != CACHE_VERSION or source is None:
+        return False
+    stamp = sourceStamp(fileName, hashed=False)
+    if stamp['size'] != source['size']:
+        return False
+    #Même taille et même date: inutile de relire la source. Sinon (copie,
+    #'touch', ...) c'est le hash qui décide
+    return stamp['mtime'] == source['mtime'] or sourceStamp(fileName)['sha256'] == source['sha256']
+
+#EXPORT DES TABLES DE DISTANCES
+#Les tables sont écrites ligne par ligne, au fil des recherches de
+#Graph.baseDistances: la mémoire reste bornée par une ligne, quelle que soit
+#la taille de la base (une table 20000*20000 ne tient pas en objets python)
+def tableHeader(base)->str:
+    "Returns the header line of the text table of the base nodes"
+    return " "*5 + ''.join([f'{node1.name:^5}' for node1 in base]) + '\n'
+
+def tableRow(node0, base, distances)->str:
+    "Returns the line of the text table of the distances from node0 to the base nodes"
+    #Chemin nul (node1 == node0) ou inexistant: '-'
+    cells = [f'{"-":^5}' if node1 == node0 or d == float('inf') else f'{d:^5}'
+             for node1, d in zip(base, distances)]
+    return f'{node0.name:^5}' + ''.join(cells) + '\n'
+
+def writeText(file, base, rows):
+    "Writes the fixed-width text table of Graph.cleanerTable to file, row by row"
+    file.write(tableHeader(base))
+    for node0, distances in zip(base, rows):
+        file.write(tableRow(node0, base, distances))
+
+def writeCsv(file, base, rows):
+    "Writes the table to file as CSV, row by row (empty cell: unreachable node)"
+    writer = csv.writer(file)
+    writer.writerow([''] + [n.name for n in base])
+    for node0, distances in zip(base, rows):
+        writer.writerow([node0.name] + ['' if d == float('inf') else float(d) for d in distances])
+
+def htmlPageName(fileName:str, page:int)->str:
+    "Returns the file name of the page-th page of the HTML report fileName"
+    if page == 1:
+        return fileName
+    root, extension = os.path.splitext(fileName)
+    return f'{root}-{page}{extension}'
+
+def htmlHeader(base)->str:
+    "Returns the header row of the HTML table of the base nodes"
+    return '<tr><th></th>' + ''.join([f'<th>{html.escape(n.name)}</th>' for n in base]) + '</tr>\n'
+
+def htmlRow(node0, base, distances)->str:
+    "Returns the row of the HTML table of the distances from node0 to the base nodes"
+    cells = ['<td>-</td>' if node1 == node0 or d == float('inf') else f'<td>{d}</td>'
+             for node1, d in zip(base, distances)]
+    return f'<tr><th>{html.escape(node0.name)}</th>' + ''.join(cells) + '</tr>\n'
+
+def writeHtml(fileName:str, base, rows, pageSize=100, title='graphe')->list:
+    """Writes the table as an HTML report of pageSize rows per page, linked to
+    each other, and returns the file names of the pages"""
+    pages = max(1, -(-len(base) // pageSize))
+    names = []
+    rows = iter(rows)
+    for page in range(1, pages + 1):
+        names.append(htmlPageName(fileName, page))
+        links = [f'page {page}/{pages}']
+        if page > 1:
+            links.insert(0, f'<a href="{os.path.basename(htmlPageName(fileName, page - 1))}">précédente</a>')
+        if page < pages:
+            links.append(f'<a href="{os.path.basename(htmlPageName(fileName, page + 1))}">suivante</a>')
+        with open(names[-1], 'w', encoding='utf-8') as file:
+            file.write(f'<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"><title>{html.escape(title)}</title></head>\n'
+                       f'<body>\n<h1>{html.escape(title)}</h1>\n<p>{" | ".join(links)}</p>\n'
+                       f'<table border="1">\n' + htmlHeader(base))
+            for node0 in base[(page - 1)*pageSize:page*pageSize]:
+                file.write(htmlRow(node0, base, next(rows)))
+            file.write(f'</table>\n<p>{" | ".join(links)}</p>\n</body>\n</html>\n')
+    return names
+
+def writeNpy(fileName:str, base, rows):
+    """Writes the table as a float64 .npy array (row i: distances from base[i],
+    inf if unreachable), filled row by row through a memory map"""
+    table = np.lib.format.open_memmap(fileName, mode='w+', dtype=np.float64, shape=(len(base), len(base)))
+    for i, distances in enumerate(rows):
+        table[i] = distances
+    table.flush()
+    del table
+
+#RENDU GRAPHVIZ
+def dotId(name:str)->str:
+    "Returns name as a quoted DOT identifier"
+    return '"' + name.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+#CALCUL PARALLELE
+#Graphe des processus de calcul, créé par initWorker
+workerGraph = None
+
+def initWorker(offsets, targets, weights):
+    "Initialises the graph of a worker process from CSR arrays"
+    global workerGraph
+    #Pas de noms ni d'objets Node: les processus ne manipulent que des IDs
+    workerGraph = FrozenGraph([], offsets, targets, weights, nodes=[])
+
+def distanceRow(source):
+    "Returns the array of the shortest distances from source in the worker's graph"
+    return workerGraph.shortestDistances(source)[0]
+
+def farthestNode(source, graph=None)->tuple:
+    """Returns the ID of the farthest node from source and its distance
+    (in the worker's graph by default)"""
+    dist = (graph or workerGraph).shortestDistances(source)[0]
+    far = int(np.argmax(dist))
+    return far, float(dist[far])
     
 class Parser:
 #---Dunder methods    
@@ -444,6 +2614,7 @@ class Parser:
         self.graphePattern = headingPattern + sommetsPattern + arcsPattern + tailPattern
 
  #---Custom methods       
+    @profiled('Parser.parse')
     def parse(self, fileName: str):
         "Parse a <GRAPHE> </GRAPHE> structure encoded in the '../fileName' file"
         #ATTENTION: On suppose que le fichier en question est bien encodé et ne contient qu'un graphe
@@ -456,10 +2627,214 @@ class Parser:
             print(err)
         return retourParser
     
+    def blocks(self, fileName: str):
+        """Yields, lazily, the parse result of each <GRAPHE> </GRAPHE>
+        structure of the '../fileName' file
+        Raises pp.ParseException on the first text that isn't one (as
+        StreamParser.blocks does): scanString alone would skip it"""
+        with open(fileName) as file:
+            text = file.read()
+        end = 0
+        for parsedData, start, end_ in self.graphePattern.scanString(text):
+            self.checkGap(text, end, start)
+            yield parsedData
+            end = end_
+        if end == 0:
+            #Aucune structure dans le fichier: même erreur que Parser.parse
+            self.graphePattern.parseString(text)
+        self.checkGap(text, end, len(text))
+    
+    def checkGap(self, text: str, start: int, end: int):
+        "Raises pp.ParseException if text[start:end] isn't blank, at its first error"
+        gap = text[start:end]
+        if gap.strip():
+            loc = start + len(gap) - len(gap.lstrip())
+            #Même message que Parser.parse: on reprend l'analyse à cet endroit
+            self.graphePattern.tryParse(text, loc)
+            raise pp.ParseException(text, loc, "Expected '<GRAPHE'")
+    
     def createDiagram(self, filename = 'diagramme'):
         if int(pp.__version__.split('.')[0]) >= 3:
             self.graphePattern.create_diagram('parser_element_sommets_diag.html')
 
+class StreamParser:
+    """Parser of the same <GRAPHE> </GRAPHE> structure without pyparsing: the
+    file is read in a single pass, line by line, with regular expressions"""
+#---Dunder methods
+    def __init__(self):
+        "Initialise l'automate du parser"
+        #Aucun élément de la syntaxe ne s'étend sur plusieurs lignes (seuls les
+        #blancs entre deux éléments le peuvent): on lit donc ligne par ligne,
+        #l'état de l'automate étant conservé d'une ligne à l'autre
+        self.blank = re.compile(r'\s*')
+        name = (re.compile(r'[A-Za-z0-9_]+'), 'a parameter name')
+        sommet = (re.compile(r'[A-Za-z]+'), 'a node name')
+        
+        def literal(text):
+            return (re.compile(re.escape(text)), repr(text))
+        
+        #état: [(élément attendu, état suivant), ...]
+        self.transitions = {
+            'start':      [(literal('<GRAPHE'), 'parameters')],
+            'parameters': [(name, 'equal'), (literal('>'), 'sommetsOpen')],
+            'equal':      [(literal('="'), 'value')],
+            'value':      [((re.compile(r'[A-Za-z0-9_.:\- ]+'), 'a parameter value'), 'quote')],
+            'quote':      [(literal('"'), 'comma')],
+            'comma':      [(literal(','), 'parameters'), (name, 'equal'), (literal('>'), 'sommetsOpen')],
+            'sommetsOpen':[(literal('<SOMMETS>'), 'sommets')],
+            'sommets':    [(sommet, 'sommetEnd'), (literal('</SOMMETS>'), 'arcsOpen')],
+            'sommetEnd':  [(literal(';'), 'sommets')],
+            'arcsOpen':   [(literal('<ARCS>'), 'arcs')],
+            'arcs':       [(sommet, 'colon1'), (literal('</ARCS>'), 'tail')],
+            'colon1':     [(literal(':'), 'target')],
+            'target':     [(sommet, 'colon2')],
+            'colon2':     [(literal(':'), 'weight')],
+            'weight':     [((re.compile(r'[0-9]+'), 'a weight'), 'arcEnd')],
+            'arcEnd':     [(literal(';'), 'arcs')],
+            'tail':       [(literal('</GRAPHE>'), 'end')],
+            'end':        [(literal('<GRAPHE'), 'parameters')]}
+        
+        #Erreurs placées comme celles de pyparsing: un élément répété
+        #(paramètre, sommet, arc) incomplet est abandonné, et pyparsing attend
+        #la fin de la répétition au début de cet élément
+        #état: élément attendu par pyparsing à la place de l'élément en cours
+        self.repetitionEnd = {'parameters': "'>'", 'comma': "'>'", 'sommets': "'</SOMMETS>'", 'arcs': "'</ARCS>'"}
+        #état incomplet: état du début de l'élément
+        self.elementStart = {'equal': 'parameters', 'value': 'parameters', 'quote': 'parameters',
+                             'sommetEnd': 'sommets', 'colon1': 'arcs', 'target': 'arcs',
+                             'colon2': 'arcs', 'weight': 'arcs', 'arcEnd': 'arcs'}
+        #Mot cité dans le message ("found 'C'"), comme pyparsing
+        self.word = re.compile(r'[^\W_]{1,16}|.', re.S)
+        
+        #Chemins rapides pour les cas courants: un sommet ou un arc complet
+        self.sommetPattern = re.compile(r'([A-Za-z]+)\s*;')
+        self.arcPattern = re.compile(r'([A-Za-z]+)\s*:\s*([A-Za-z]+)\s*:\s*([0-9]+)\s*;')
+    
+#---Custom methods
+    @profiled('StreamParser.read')
+    def read(self, fileName: str):
+        """Reads the '../fileName' file and returns its parameters (dict), its
+        set of nodes and its set of arcs
+        Raises IncorrectSyntax on the first syntax error"""
+        blocks = list(self.blocks(fileName))
+        if len(blocks) > 1:
+            #Pseudo-erreur, juste à titre informatif
+            warnings.warn(f'{fileName} holds {len(blocks)} graphs, only the first one is read', AmbiguousElement, stacklevel=2)
+        return blocks[0]
+    
+    def syntaxError(self, state, line, lineno, pos, loc, element):
+        """Returns the IncorrectSyntax of the state at pos in line (pos past
+        its end: end of text), located and worded as pyparsing does
+        element: (line, lineno, pos, loc) of the start of the current element"""
+        if state in self.elementStart:
+            line, lineno, pos, loc = element
+            state = self.elementStart[state]
+        expected = self.repetitionEnd.get(state) or ' or '.join([e for (_, e), _ in self.transitions[state]])
+        found = repr(self.word.match(line, pos).group()) if pos < len(line) else 'end of text'
+        return IncorrectSyntax(line, lineno, pos+1, loc+pos, expected, found)
+    
+    def blocks(self, fileName: str):
+        """Yields, lazily, the parameters (dict), the set of nodes and the set
+        of arcs of each <GRAPHE> </GRAPHE> structure of the '../fileName' file
+        Raises IncorrectSyntax on the first syntax error, at the same place
+        as Parser.parse"""
+        #Un seul objet float par poids distinct, pour tous les graphes du fichier
+        weights = dict()
+        
+        def newBlock():
+            #Un arc désigne le premier sommet déclaré sous ce nom (cf. Graph.getNode)
+            return dict(), set(), set(), dict()
+        parametres, nodes, arcs, nodesByName = newBlock()
+        
+        def addNode(name):
+            node = Node(name)
+            nodes.add(node)
+            nodesByName.setdefault(name, node)
+        
+        def addArc(source, target, weight):
+            if not (source in nodesByName and target in nodesByName):
+                raise UnexistingElement
+            if not weight in weights: weights[weight] = float(weight)
+            arcs.add(Arc(nodesByName[source], nodesByName[target], weights[weight]))
+        
+        state = 'start'
+        loc = 0
+        line, lineno = '', 1
+        element = None
+        with open(fileName) as file:
+            for lineno, line in enumerate(file, 1):
+                pos = self.blank.match(line).end()
+                while pos < len(line):
+                    if state == 'arcs':
+                        match = self.arcPattern.match(line, pos)
+                        if match:
+                            addArc(*match.groups())
+                            pos = self.blank.match(line, match.end()).end()
+                            continue
+                    elif state == 'sommets':
+                        match = self.sommetPattern.match(line, pos)
+                        if match:
+                            addNode(match.group(1))
+                            pos = self.blank.match(line, match.end()).end()
+                            continue
+                    
+                    if state in self.repetitionEnd:
+                        element = (line, lineno, pos, loc)
+                    for (pattern, _), nextState in self.transitions[state]:
+                        match = pattern.match(line, pos)
+                        if match: break
+                    else:
+                        raise self.syntaxError(state, line, lineno, pos, loc, element)
+                    
+                    #Eléments porteurs de données
+                    token = match.group()
+                    if state in ('parameters', 'comma') and nextState == 'equal':
+                        key = token
+                    elif state == 'value':
+                        parametres[key] = token
+                    elif state == 'sommets' and nextState == 'sommetEnd':
+                        addNode(token)
+                    elif state == 'arcs' and nextState == 'colon1':
+                        arc = [token]
+                    elif state in ('target', 'weight'):
+                        arc.append(token)
+                        if state == 'weight': addArc(*arc)
+                    
+                    state = nextState
+                    pos = self.blank.match(line, match.end()).end()
+                    if state == 'end':
+                        yield parametres, nodes, arcs
+                        parametres, nodes, arcs, nodesByName = newBlock()
+                loc += len(line)
+        if state != 'end':
+            #Fin du texte: après la dernière ligne si elle se termine par un saut de ligne
+            if line.endswith('\n'):
+                line, lineno = '', lineno + 1
+            raise self.syntaxError(state, line, lineno, len(line), loc - len(line), element)
+    
+    def parseInto(self, graph, fileName: str)->bool:
+        """Loads the <GRAPHE> </GRAPHE> structure encoded in the '../fileName'
+        file into graph. Returns False (graph unchanged) on a syntax error"""
+        try:
+            parametres, nodes, arcs = self.read(fileName)
+        except IncorrectSyntax as err:
+            print(err.line)
+            print(" "*(err.column-1) + "^")
+            print(err)
+            return False
+        self.fill(graph, parametres, nodes, arcs)
+        return True
+    
+    def fill(self, graph, parametres, nodes, arcs):
+        "Replaces the content of graph by the parameters, nodes and arcs of StreamParser.blocks"
+        if 'Name' in parametres:
+            graph.name = parametres['Name']
+        graph.nodes = set()
+        graph.arcs = set()
+        graph.index()
+        graph.addNodes(nodes)
+        graph.addArcs(arcs)
+
 
 if __name__ == "__main__":
     p = Parser()
@@ -470,10 +2845,5 @@ if __name__ == "__main__":
     BASE.sort()
     
     lsp = g.longestShortestPath()
-    G =  gv.Digraph(g.name, filename=f'{g.name}.gv', format='svg')
-    for arc in (g - lsp).arcs:
-        G.edge(arc.source.name, arc.target.name, label=f'{arc.weight}')
-    for arc in lsp.arcs:
-        G.edge(arc.source.name, arc.target.name, label=f'{arc.weight}', color='red')
-    for n in lsp.nodes:
-        G.node(n.name, color='red', fontcolor='red')
\ No newline at end of file
+    #Tout le graphe, le plus long des plus courts chemins en rouge (sans copier g - lsp)
+    G = g.render(path=lsp, hops=None)
\ No newline at end of file